@@ -1,4 +1,8 @@
+import time
+# Taken before the imports below, so the first-run timing includes them.
+PAGE_STARTED = time.perf_counter()
 import streamlit as st
+from engli.startup_profile import record_first_run
 
 st.set_page_config(layout="wide", page_title="Engli - English Trainer", page_icon="📖")
 
@@ -229,3 +233,5 @@ st.markdown("""
     </div>
 </div>
 """, unsafe_allow_html=True)
+
+record_first_run("app", PAGE_STARTED)
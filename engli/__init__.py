@@ -0,0 +1 @@
+"""Shared helpers for the Engli Streamlit app (caching, audio, pipelines)."""
@@ -0,0 +1,69 @@
+import threading
+
+from engli.chunked_transcription import segment_value
+
+
+class TierPolicy:
+    """
+    When a fast Whisper result is trusted and when it is re-run.
+
+    A result is escalated to the accurate model when its duration-weighted
+    average log-probability is below `min_avg_logprob`, when any segment
+    with text looks like no speech (`max_no_speech_prob`), or when it has no
+    segments to judge at all.
+    """
+
+    def __init__(self, fast_model="whisper-large-v3-turbo", accurate_model="whisper-large-v3",
+                 min_avg_logprob=-0.7, max_no_speech_prob=0.6):
+        self.fast_model = fast_model
+        self.accurate_model = accurate_model
+        self.min_avg_logprob = min_avg_logprob
+        self.max_no_speech_prob = max_no_speech_prob
+
+    def confidence(self, result):
+        """(weighted avg_logprob, worst no_speech_prob), or None without segments."""
+        total = 0.0
+        weighted = 0.0
+        no_speech = 0.0
+        for segment in segment_value(result, "segments") or []:
+            logprob = segment_value(segment, "avg_logprob")
+            if logprob is None:
+                continue
+            length = max(float(segment_value(segment, "end", 0.0)) - float(segment_value(segment, "start", 0.0)), 0.01)
+            total += length
+            weighted += logprob * length
+            if (segment_value(segment, "text") or "").strip():
+                no_speech = max(no_speech, segment_value(segment, "no_speech_prob") or 0.0)
+        if total == 0:
+            return None
+        return weighted / total, no_speech
+
+    def should_escalate(self, result):
+        confidence = self.confidence(result)
+        if confidence is None:
+            return True
+        avg_logprob, no_speech = confidence
+        return avg_logprob < self.min_avg_logprob or no_speech > self.max_no_speech_prob
+
+
+class EscalationCounter:
+    """Process-wide count of fast transcriptions and how many were escalated."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.fast = 0
+        self.escalated = 0
+
+    def record(self, escalated):
+        with self._lock:
+            self.fast += 1
+            if escalated:
+                self.escalated += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "fast_transcriptions": self.fast,
+                "escalations": self.escalated,
+                "escalation_rate": self.escalated / self.fast if self.fast else 0.0,
+            }
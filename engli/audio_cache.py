@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def audio_key(text, voice, engine, fmt):
+    """Content address for a synthesized clip."""
+    payload = json.dumps([text, voice, engine, fmt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Content-addressed store for synthesized speech.
+
+    Clips live in a size-bounded folder on disk (least recently used files
+    are evicted first) with a smaller in-memory tier in front of it for the
+    greetings and corrections that repeat across sessions. The folder is
+    scanned once at start-up; after that its size and LRU order are kept in
+    memory, so a write only touches the disk to evict when over the limit.
+    """
+
+    def __init__(self, folder, max_disk_bytes=200 * 1024 * 1024, max_memory_bytes=32 * 1024 * 1024):
+        self.folder = folder
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(folder, exist_ok=True)
+        # key -> size of every clip on disk, least recently used first.
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._index_disk()
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + ".audio")
+
+    def _index_disk(self):
+        entries = []
+        for name in os.listdir(self.folder):
+            if not name.endswith(".audio"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[: -len(".audio")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _remember(self, key, data):
+        if len(data) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # Touch the file so disk eviction stays least-recently-used.
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+                # Removed by another process, or never written.
+                self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, data)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._remember(key, data)
+        try:
+            # Write to a unique temp file and rename so concurrent sessions
+            # never observe a half-written clip.
+            fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes += len(data) - self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+        self._evict_disk()
+
+    def _evict_disk(self):
+        while True:
+            with self._lock:
+                if self._disk_bytes <= self.max_disk_bytes or len(self._disk) <= 1:
+                    return
+                key, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                continue
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
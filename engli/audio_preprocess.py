@@ -0,0 +1,122 @@
+import io
+from dataclasses import dataclass, field
+
+import numpy as np
+from pydub import AudioSegment
+
+from engli.chunked_transcription import chunk_bounds
+from engli.vad import pause_profile, trim_silence
+
+# pydub export settings and the filename extension Whisper expects for each.
+UPLOAD_FORMATS = {
+    "wav": ("wav", {}),
+    "flac": ("flac", {}),
+    "opus": ("ogg", {"codec": "libopus", "bitrate": "24k"}),
+}
+
+
+class EmptyRecording(Exception):
+    """The recording contains no speech, so there is nothing to transcribe."""
+
+
+@dataclass
+class UploadChunk:
+    """One file to send to Whisper and where it starts in the recording."""
+
+    filename: str
+    data: bytes
+    offset: float = 0.0
+
+
+@dataclass
+class PreparedAudio:
+    """A recording ready for upload, with what preprocessing saved."""
+
+    chunks: list
+    original_bytes: int
+    duration: float
+    trimmed_seconds: float = 0.0
+    # Timing of the original speech, for fluency analytics.
+    speech_seconds: float = None
+    pauses: list = field(default_factory=list)
+
+    @property
+    def upload_bytes(self):
+        return sum(len(chunk.data) for chunk in self.chunks)
+
+    @property
+    def bytes_saved(self):
+        return self.original_bytes - self.upload_bytes
+
+
+def downmix(segment, sample_rate=16000):
+    """Mono 16-bit PCM at `sample_rate`, which is all Whisper uses."""
+    return segment.set_channels(1).set_frame_rate(sample_rate).set_sample_width(2)
+
+
+def export(segment, fmt="flac"):
+    """Encode a segment for upload, returning (filename, bytes)."""
+    extension, options = UPLOAD_FORMATS[fmt]
+    buffer = io.BytesIO()
+    segment.export(buffer, format=extension, **options)
+    return f"recorded_audio.{extension}", buffer.getvalue()
+
+
+def samples_of(segment):
+    return np.array(segment.get_array_of_samples(), dtype=np.int16)
+
+
+def trim(segment):
+    """Drop silence from a mono 16-bit segment with the energy VAD."""
+    trimmed = trim_silence(samples_of(segment), segment.frame_rate)
+    return segment._spawn(trimmed.tobytes())
+
+
+def encode(segment, fmt, offset=0.0):
+    try:
+        filename, data = export(segment, fmt)
+    except Exception:
+        filename, data = export(segment, "wav")
+    return UploadChunk(filename, data, offset)
+
+
+def prepare_for_upload(wav_bytes, sample_rate=16000, fmt="flac", vad=True, chunk_seconds=None):
+    """
+    Shrink a browser recording before it is sent to Whisper.
+
+    st_audiorec produces 44.1/48 kHz stereo WAV. Downmixing to mono and
+    resampling to 16 kHz alone cuts that by roughly 85%; with `vad` the
+    leading/trailing silence and long pauses are cut too, and FLAC or Opus
+    encoding shrinks it further. If the compressed encoder is unavailable
+    (FLAC and Opus need ffmpeg) the resampled WAV is used instead.
+
+    With `chunk_seconds`, recordings longer than that are cut at the
+    quietest point near each boundary so the chunks can be transcribed in
+    parallel.
+
+    Raises EmptyRecording when no speech is found.
+    """
+    segment = downmix(AudioSegment.from_file(io.BytesIO(wav_bytes), format="wav"), sample_rate)
+    original_seconds = segment.duration_seconds
+    speech_seconds, pauses = None, []
+    if vad:
+        speech_seconds, pauses = pause_profile(samples_of(segment), sample_rate)
+        segment = trim(segment)
+        if len(segment) == 0:
+            raise EmptyRecording("No speech detected in the recording")
+    if chunk_seconds:
+        samples = samples_of(segment)
+        chunks = [
+            encode(segment._spawn(samples[start:end].tobytes()), fmt, start / sample_rate)
+            for start, end in chunk_bounds(samples, sample_rate, chunk_seconds, chunk_seconds / 3)
+        ]
+    else:
+        chunks = [encode(segment, fmt)]
+    return PreparedAudio(
+        chunks,
+        len(wav_bytes),
+        segment.duration_seconds,
+        original_seconds - segment.duration_seconds,
+        speech_seconds,
+        pauses,
+    )
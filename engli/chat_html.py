@@ -0,0 +1,24 @@
+from functools import lru_cache
+
+
+def message_html(role, content):
+    """Chat bubble HTML for one message, uncached for replies that are still streaming."""
+    if role == "user":
+        return f"""<div class="chat-message user-message">
+                            👤 You:<br>{content}
+                        </div>"""
+    if role == "assistant_translated":
+        return f"""<div class="chat-message translated-message">
+                            🤖 Engli (Translated):<br>{content}
+                        </div>"""
+    return f"""<div class="chat-message assistant-message">
+                            🤖 Engli:<br>{content}
+                        </div>"""
+
+
+# Streamlit re-executes page scripts in a fresh namespace on every full
+# rerun, so the cache lives here, in a module imported once per process.
+@lru_cache(maxsize=1024)
+def render_message(role, content):
+    """message_html for a finished message, memoized across reruns and sessions."""
+    return message_html(role, content)
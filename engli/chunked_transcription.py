@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Transcript:
+    """
+    Whisper verbose_json output, possibly stitched from several chunks.
+
+    `segments` are plain dicts with start/end in seconds from the start of
+    the whole recording, so callers never need to know it was chunked.
+    """
+
+    text: str
+    segments: list = field(default_factory=list)
+    duration: float = 0.0
+    model: str = ""
+
+
+def chunk_bounds(samples, sample_rate, max_seconds=30.0, min_seconds=10.0, frame_ms=30):
+    """
+    (start, end) sample ranges of at most `max_seconds` each.
+
+    Each cut is placed at the quietest frame between `min_seconds` and
+    `max_seconds` into the current chunk, so words are not split in half,
+    and never less than `min_seconds` before the end, so the last chunk is
+    not a sliver Whisper would hallucinate on.
+    """
+    # NumPy is only needed for cutting, so the segment helpers used by
+    # fluency and ASR tiers stay cheap to import.
+    import numpy as np
+
+    from engli.vad import frame_energies
+
+    total = len(samples)
+    max_length = int(max_seconds * sample_rate)
+    min_length = int(min_seconds * sample_rate)
+    if total <= max_length:
+        return [(0, total)]
+
+    energies, frame_length = frame_energies(samples, sample_rate, frame_ms)
+    bounds = []
+    start = 0
+    while total - start > max_length:
+        end = min(start + max_length, total - min_length)
+        first = (start + min_length) // frame_length
+        last = end // frame_length
+        window = energies[first:last]
+        cut = (first + int(np.argmin(window))) * frame_length if len(window) else end
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, total))
+    return bounds
+
+
+def segment_value(segment, name, default=None):
+    """Read a segment field whether the SDK returned dicts or objects."""
+    if isinstance(segment, dict):
+        return segment.get(name, default)
+    return getattr(segment, name, default)
+
+
+def stitch(results, offsets, model=""):
+    """Join per-chunk verbose_json results, shifting timestamps by each chunk's offset."""
+    texts = []
+    segments = []
+    duration = 0.0
+    for result, offset in zip(results, offsets):
+        text = (segment_value(result, "text") or "").strip()
+        if text:
+            texts.append(text)
+        for segment in segment_value(result, "segments") or []:
+            shifted = {
+                "id": len(segments),
+                "start": offset + float(segment_value(segment, "start", 0.0)),
+                "end": offset + float(segment_value(segment, "end", 0.0)),
+                "text": segment_value(segment, "text", ""),
+                "avg_logprob": segment_value(segment, "avg_logprob"),
+                "no_speech_prob": segment_value(segment, "no_speech_prob"),
+            }
+            segments.append(shifted)
+        chunk_duration = segment_value(result, "duration")
+        duration = max(duration, offset + float(chunk_duration or 0.0))
+    if segments:
+        duration = max(duration, segments[-1]["end"])
+    return Transcript(" ".join(texts), segments, duration, model)
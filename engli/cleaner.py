@@ -0,0 +1,78 @@
+import re
+
+# One pass over the reply: stage directions like (laughs), **smiles**,
+# *pauses*, [waves] or _sighs_ are dropped, whitespace runs become a single
+# space, and everything else is kept. A delimiter that does not open a
+# complete span falls through to `other` and is kept as-is.
+TOKEN = re.compile(
+    r"(?P<span>\([^)]+\)|\*\*[^*]+\*\*|\*[^*]+\*|\[[^\]]+\]|_[^_]+_)"
+    r"|(?P<space>\s+)"
+    # Words joined by single spaces are taken as one token, since they are
+    # already clean.
+    r"|(?P<text>[^\s(*\[_]+(?: [^\s(*\[_.,!?][^\s(*\[_]*)*)"
+    r"|(?P<other>.)",
+    re.S,
+)
+# An opening delimiter whose span could still be completed by later text.
+OPEN_SPAN = re.compile(r"\([^)]*\Z|\[[^\]]*\Z|_[^_]*\Z|\*\*?[^*]*\Z|\*\*[^*]+\*\Z")
+PUNCTUATION = ".,!?"
+
+
+class StreamingCleaner:
+    """
+    Removes action descriptors from a reply as it is generated.
+
+    `feed` takes the next chunk of model output and returns the clean text
+    that is now safe to show; only an unclosed `(`, `*`, `[` or `_` span and
+    trailing whitespace are held back. `flush` returns the rest once the
+    reply is complete. The concatenated output is the same however the
+    reply was chunked.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pending_space = False
+        self._started = False
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        return self._scan(final=False)
+
+    def flush(self):
+        return self._scan(final=True)
+
+    def _scan(self, final):
+        buffer = self._buffer
+        out = []
+        consumed = 0
+        for match in TOKEN.finditer(buffer):
+            kind = match.lastgroup
+            if kind == "other" and not final and OPEN_SPAN.match(buffer, match.start()):
+                break
+            consumed = match.end()
+            if kind == "span":
+                continue
+            if kind == "space":
+                self._pending_space = True
+                continue
+            token = match.group()
+            # A space is only written once the next word shows it is not
+            # trailing and not sitting before punctuation.
+            if self._pending_space and self._started and token[0] not in PUNCTUATION:
+                out.append(" ")
+            self._pending_space = False
+            self._started = True
+            out.append(token)
+        self._buffer = buffer[consumed:]
+        return "".join(out)
+
+
+def clean_action_descriptors(text):
+    """
+    Remove action descriptors like (laughs), (pauses), **smiles**, etc.
+    from the text.
+    """
+    if not text:
+        return text
+    cleaner = StreamingCleaner()
+    return cleaner.feed(text) + cleaner.flush()
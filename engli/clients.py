@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import httpx
+from groq import AsyncGroq, Groq
+
+GROQ_URL = "https://api.groq.com"
+DEEPGRAM_URL = "https://api.deepgram.com"
+
+
+class ApiClients:
+    """
+    Groq and Deepgram clients shared by every session in the process.
+
+    All clients sit on keep-alive httpx pools, so consecutive calls reuse
+    open TLS connections instead of handshaking again. httpx clients are
+    thread-safe; the async ones must only be used from the pipeline loop.
+    Deepgram TTS goes straight to the REST endpoint because the SDK opens a
+    new HTTP client for every request.
+    """
+
+    def __init__(self, groq_api_key, deepgram_api_key, max_connections=20, max_keepalive=10,
+                 keepalive_expiry=60.0, timeout=60.0):
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.keepalive_expiry = keepalive_expiry
+        self._groq_http = httpx.Client(limits=limits, timeout=timeout)
+        self._groq_async_http = httpx.AsyncClient(limits=limits, timeout=timeout)
+        deepgram_headers = {"Authorization": f"Token {deepgram_api_key}"}
+        self._deepgram_async_http = httpx.AsyncClient(base_url=DEEPGRAM_URL, headers=deepgram_headers, limits=limits, timeout=timeout)
+
+        # Retries are left to engli.resilience, so the SDK's own are turned off.
+        self.groq = Groq(api_key=groq_api_key, http_client=self._groq_http, max_retries=0)
+        self.async_groq = AsyncGroq(api_key=groq_api_key, http_client=self._groq_async_http, max_retries=0)
+
+        self._last_used = 0.0
+        self._warming = threading.Lock()
+
+    async def aspeak(self, text, model, encoding="mp3"):
+        """Deepgram TTS over the pooled async connection; returns audio bytes."""
+        self.touch()
+        response = await self._deepgram_async_http.post("/v1/speak", params={"model": model, "encoding": encoding}, json={"text": text})
+        response.raise_for_status()
+        return response.content
+
+    def touch(self):
+        self._last_used = time.monotonic()
+
+    def warm_up(self, loop=None):
+        """
+        Open connections to the providers in the background.
+
+        Any response (even 401/404) leaves a live TLS connection in the pool.
+        Pass the pipeline's event loop to warm the async pools as well;
+        Deepgram is only called from there.
+        """
+        if not self._warming.acquire(blocking=False):
+            return
+        self.touch()
+
+        def warm_sync():
+            try:
+                self._groq_http.head(GROQ_URL)
+            except httpx.HTTPError:
+                pass
+            finally:
+                self._warming.release()
+
+        threading.Thread(target=warm_sync, name="engli-warmup", daemon=True).start()
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._warm_async(), loop)
+
+    async def _warm_async(self):
+        async def head(http, url):
+            try:
+                await http.head(url)
+            except httpx.HTTPError:
+                pass
+
+        await asyncio.gather(
+            head(self._groq_async_http, GROQ_URL),
+            head(self._deepgram_async_http, DEEPGRAM_URL),
+        )
+
+    def warm_if_idle(self, loop=None):
+        """Re-warm when pooled connections have probably expired."""
+        if time.monotonic() - self._last_used > self.keepalive_expiry * 0.8:
+            self.warm_up(loop)
@@ -0,0 +1,90 @@
+import threading
+
+CHAT_ROLES = ("user", "assistant")
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def message_tokens(message):
+    # A few tokens of per-message overhead for the role and separators.
+    return estimate_tokens(message["content"]) + 4
+
+
+class ConversationSummary:
+    """
+    Rolling summary of the turns that have left the context window.
+
+    `covered` is how many chat messages (user/assistant, oldest first) the
+    summary text accounts for. It is updated in the background, so readers
+    may see a summary that lags a turn or two behind.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.covered = 0
+        self._lock = threading.Lock()
+        self._updating = False
+
+    def begin_update(self):
+        """Claim the single in-flight update slot; False if one is running."""
+        with self._lock:
+            if self._updating:
+                return False
+            self._updating = True
+            return True
+
+    def finish_update(self, text=None, covered=None):
+        with self._lock:
+            if text is not None:
+                self.text = text
+                self.covered = covered
+            self._updating = False
+
+
+class ContextWindow:
+    """
+    Builds the messages sent to the model under a token budget.
+
+    The system prompt is always kept, followed by the rolling summary (when
+    there is one) and then as many of the most recent turns as fit in both
+    `keep_turns` and `budget_tokens`. Everything older is handed back as
+    overflow so the caller can fold it into the summary.
+    """
+
+    def __init__(self, budget_tokens=3000, keep_turns=6):
+        self.budget_tokens = budget_tokens
+        self.keep_turns = keep_turns
+
+    def build(self, history, summary):
+        system = [msg for msg in history if msg["role"] == "system"][:1]
+        chat = [msg for msg in history if msg["role"] in CHAT_ROLES]
+
+        messages = list(system)
+        if summary.text:
+            messages.append({"role": "system", "content": "Summary of the earlier conversation: " + summary.text})
+        used = sum(message_tokens(msg) for msg in messages)
+
+        start = len(chat)
+        turns = 0
+        while start > 0:
+            # Walk back one user/assistant turn at a time.
+            turn_start = start - 1
+            while turn_start > 0 and chat[turn_start]["role"] != "user":
+                turn_start -= 1
+            cost = sum(message_tokens(msg) for msg in chat[turn_start:start])
+            if turns >= self.keep_turns or (turns > 0 and used + cost > self.budget_tokens):
+                break
+            used += cost
+            turns += 1
+            start = turn_start
+
+        messages.extend(chat[start:])
+        overflow = chat[summary.covered:start] if start > summary.covered else []
+        return messages, overflow, start
+
+    @staticmethod
+    def used_tokens(messages):
+        return sum(message_tokens(msg) for msg in messages)
@@ -0,0 +1,66 @@
+import re
+from dataclasses import dataclass, field
+
+from engli.chunked_transcription import segment_value
+
+# Hesitation markers and discourse fillers. "like" is left out because it is
+# far more often a verb than a filler in learners' speech.
+FILLERS = ("um", "umm", "uh", "uhm", "er", "erm", "ah", "hmm", "you know", "i mean", "sort of", "kind of", "basically")
+FILLER_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(f) for f in FILLERS) + r")\b", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[A-Za-z']+")
+
+
+@dataclass
+class FluencyReport:
+    """Fluency measures for one spoken turn."""
+
+    words: int
+    speaking_rate: float       # words per minute, pauses included
+    pause_ratio: float         # share of the utterance spent silent
+    long_pauses: int           # pauses longer than a second
+    fillers: int
+    filler_rate: float         # fillers per 100 words
+    low_confidence_words: list = field(default_factory=list)
+
+
+def analyze(segments, speech_seconds=None, pauses=None, low_logprob=-1.0, long_pause=1.0):
+    """
+    Work out a FluencyReport from Whisper verbose_json segments.
+
+    When the recording's own `speech_seconds` and `pauses` are known (from
+    the VAD, before silence was trimmed) they are used for timing; otherwise
+    the gaps between segments stand in for pauses. Words in segments whose
+    avg_logprob is below `low_logprob` are reported as low confidence.
+    """
+    text = " ".join((segment_value(segment, "text") or "").strip() for segment in segments)
+    words = len(WORD_PATTERN.findall(text))
+    fillers = len(FILLER_PATTERN.findall(text))
+
+    if pauses is None or speech_seconds is None:
+        speech_seconds = 0.0
+        pauses = []
+        previous_end = None
+        for segment in segments:
+            start = float(segment_value(segment, "start", 0.0))
+            end = float(segment_value(segment, "end", 0.0))
+            speech_seconds += max(end - start, 0.0)
+            if previous_end is not None and start > previous_end:
+                pauses.append(start - previous_end)
+            previous_end = end
+
+    total = speech_seconds + sum(pauses)
+    low_confidence = []
+    for segment in segments:
+        logprob = segment_value(segment, "avg_logprob")
+        if logprob is not None and logprob < low_logprob:
+            low_confidence.extend(WORD_PATTERN.findall(segment_value(segment, "text") or ""))
+
+    return FluencyReport(
+        words=words,
+        speaking_rate=round(words / total * 60, 1) if total else 0.0,
+        pause_ratio=round(sum(pauses) / total, 3) if total else 0.0,
+        long_pauses=sum(1 for pause in pauses if pause > long_pause),
+        fillers=fillers,
+        filler_rate=round(fillers / words * 100, 1) if words else 0.0,
+        low_confidence_words=low_confidence,
+    )
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+from engli.model_router import percentile
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate request, from recent latency per call.
+
+    A backup request is fired once the primary has taken longer than the
+    `percentile` of recent latencies for the same key (clamped to
+    `min_delay`..`max_delay`). Nothing is hedged until `min_samples`
+    latencies have been seen, or while more than `max_hedge_rate` of
+    requests have already been hedged, so a slow provider is not hit with
+    twice the load.
+    """
+
+    def __init__(self, percentile=0.95, min_delay=0.2, max_delay=10.0, min_samples=20,
+                 max_hedge_rate=0.1, window=200):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self.requests = 0
+        self.hedged = 0
+        self.backup_wins = 0
+
+    def delay(self, key):
+        """Seconds to wait before hedging a `key` request, or None to not hedge."""
+        with self._lock:
+            samples = list(self._latencies.get(key, ()))
+            over_budget = self.requests and self.hedged / self.requests > self.max_hedge_rate
+        if len(samples) < self.min_samples or over_budget:
+            return None
+        return min(max(percentile(samples, self.percentile), self.min_delay), self.max_delay)
+
+    def observe(self, key, seconds):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, hedged, backup_won):
+        with self._lock:
+            self.requests += 1
+            self.hedged += hedged
+            self.backup_wins += backup_won
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+                "backup_wins": self.backup_wins,
+                "win_rate": self.backup_wins / self.hedged if self.hedged else 0.0,
+            }
+
+
+async def hedged(policy, key, primary, backup, discard=None, backup_key=None):
+    """
+    Await `primary()`, racing `backup()` against it if it is slow.
+
+    With no policy (hedging disabled) this is just `await primary()`.
+    `primary` and `backup` are coroutine functions. The first to succeed
+    wins and the other is cancelled; if one fails the other is still
+    awaited. A loser that had already finished is passed to `discard`
+    (a coroutine function) so it can release its connection. The winner's
+    own time is recorded under `key`, or `backup_key` (default `key`) when
+    the backup wins; a cancelled primary's time so far is recorded under
+    `key`, so slow tails keep counting.
+    """
+    if policy is None:
+        return await primary()
+    started = time.perf_counter()
+    delay = policy.delay(key)
+    first = asyncio.ensure_future(primary())
+    tasks = {first: started}
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            policy.observe(key, time.perf_counter() - started)
+            policy.count(False, False)
+            return first.result()
+
+        second = asyncio.ensure_future(backup())
+        tasks[second] = time.perf_counter()
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    if error is None or task is first:
+                        error = task.exception()
+                    continue
+                now = time.perf_counter()
+                policy.observe(key if task is first else backup_key or key, now - tasks[task])
+                if task is second and first in pending:
+                    policy.observe(key, now - started)
+                policy.count(True, task is second)
+                for loser in done - {task}:
+                    if discard is not None and loser.exception() is None:
+                        await discard(loser.result())
+                return task.result()
+        policy.count(True, False)
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
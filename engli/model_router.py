@@ -0,0 +1,173 @@
+import csv
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+
+
+@dataclass
+class ModelSpec:
+    """Price (USD per token), context window and benchmarked latency of a model."""
+
+    name: str
+    input_price: float
+    output_price: float
+    context_length: int
+    # Average latency from the evaluation benchmark, used until live calls are measured.
+    seed_latency: float = None
+
+
+# Prices and context lengths from the evaluation notebook's model_specs.
+MODEL_SPECS = {
+    "llama-3.3-70b-versatile": ModelSpec("llama-3.3-70b-versatile", 0.59 / 1e6, 0.79 / 1e6, 128000),
+    "llama-3.1-8b-instant": ModelSpec("llama-3.1-8b-instant", 0.05 / 1e6, 0.08 / 1e6, 128000),
+    "gemma2-9b-it": ModelSpec("gemma2-9b-it", 0.20 / 1e6, 0.20 / 1e6, 8192),
+    "mixtral-8x7b-32768": ModelSpec("mixtral-8x7b-32768", 0.24 / 1e6, 0.24 / 1e6, 32768),
+    "llama-3.2-1b-preview": ModelSpec("llama-3.2-1b-preview", 0.04 / 1e6, 0.04 / 1e6, 8192),
+}
+
+# Candidates per call type, most preferred first. Chat replies prefer the
+# strongest model; translations and title localization prefer the cheapest.
+ROUTES = {
+    "chat": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
+    "translation": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+    "title": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def seed_latencies(specs, path):
+    """
+    Copy of `specs` with seed_latency taken from the benchmark summary CSV.
+
+    The CSV has one row per model, named in its first column, with an
+    "Avg Latency (s)" column. A missing file leaves the specs unchanged.
+    """
+    seeded = dict(specs)
+    if not os.path.exists(path):
+        return seeded
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            spec = seeded.get(row.get("") or row.get("model"))
+            if spec is not None and row.get("Avg Latency (s)"):
+                seeded[spec.name] = replace(spec, seed_latency=float(row["Avg Latency (s)"]))
+    return seeded
+
+
+class ModelRouter:
+    """
+    Picks a model per call type from measured latency, cost and context length.
+
+    Each call type has candidates in order of preference. The first one
+    whose p95 latency fits the budget and whose context window fits the
+    request is used; if none fits, the fastest candidate that can hold the
+    request is. Latency is kept per call type and model, since chat replies
+    are timed to their first token and other calls to completion. It comes
+    from the last `window` such calls that are under `max_age` seconds old, once there are at least `min_samples`
+    of them; until then its benchmark seed is used. Models with neither are
+    assumed to fit, so they get tried and measured. A preferred model that
+    was passed over still gets `explore_rate` of its call type's requests,
+    so it is re-measured and can win its place back.
+    """
+
+    def __init__(self, specs=None, routes=None, budgets=None, module_budgets=None, window=200,
+                 max_age=600.0, min_samples=5, explore_rate=0.05, clock=time.monotonic, rng=random.random):
+        self.specs = specs if specs is not None else MODEL_SPECS
+        self.routes = routes if routes is not None else ROUTES
+        # Seconds per call type, and per module for chat replies.
+        self.budgets = budgets or {}
+        self.module_budgets = module_budgets or {}
+        self.window = window
+        self.max_age = max_age
+        self.min_samples = min_samples
+        self.explore_rate = explore_rate
+        self.clock = clock
+        self.rng = rng
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._calls = {}
+        self._cost = {}
+
+    def candidates(self, call_type):
+        return self.routes[call_type]
+
+    def budget(self, call_type, module=None):
+        if call_type == "chat" and module in self.module_budgets:
+            return self.module_budgets[module]
+        return self.budgets.get(call_type)
+
+    def _samples(self, call_type, model):
+        """Latencies of `model` for `call_type` recorded within max_age, dropping older ones."""
+        cutoff = self.clock() - self.max_age
+        with self._lock:
+            samples = self._latencies.get((call_type, model))
+            if samples is None:
+                return []
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            return [seconds for _, seconds in samples]
+
+    def latency(self, call_type, model, fraction=0.95):
+        """Measured latency percentile of `model` for `call_type`, else its benchmark seed, else None."""
+        samples = self._samples(call_type, model)
+        if len(samples) >= self.min_samples:
+            return percentile(samples, fraction)
+        spec = self.specs.get(model)
+        return spec.seed_latency if spec is not None else None
+
+    def choose(self, call_type, module=None, prompt_tokens=0):
+        budget = self.budget(call_type, module)
+        fitting = [
+            model for model in self.candidates(call_type)
+            if model not in self.specs or prompt_tokens < self.specs[model].context_length
+        ] or list(self.candidates(call_type))
+        for model in fitting:
+            p95 = self.latency(call_type, model)
+            if budget is None or p95 is None or p95 <= budget:
+                chosen = model
+                break
+        else:
+            chosen = min(fitting, key=lambda model: self.latency(call_type, model))
+        if chosen != fitting[0] and self.rng() < self.explore_rate:
+            return fitting[0]
+        return chosen
+
+    def record(self, call_type, model, seconds, input_tokens=0, output_tokens=0):
+        """
+        Add a finished call's latency and token usage to the model's stats for `call_type`.
+
+        For streamed chat replies `seconds` is the time to first token,
+        which is what the chat budgets are set against.
+        """
+        spec = self.specs.get(model)
+        cost = input_tokens * spec.input_price + output_tokens * spec.output_price if spec else 0.0
+        with self._lock:
+            key = (call_type, model)
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append((self.clock(), seconds))
+            self._calls[key] = self._calls.get(key, 0) + 1
+            self._cost[key] = self._cost.get(key, 0.0) + cost
+
+    def stats(self):
+        """Calls, recent latency and cost per "call_type:model"."""
+        with self._lock:
+            keys = list(self._latencies)
+            calls = dict(self._calls)
+            cost = dict(self._cost)
+        stats = {}
+        for call_type, model in keys:
+            samples = self._samples(call_type, model)
+            key = (call_type, model)
+            stats[f"{call_type}:{model}"] = {
+                "calls": calls[key],
+                "recent": len(samples),
+                "p50": round(percentile(samples, 0.5), 3) if samples else None,
+                "p95": round(percentile(samples, 0.95), 3) if samples else None,
+                "cost_usd": round(cost[key], 6),
+            }
+        return stats
@@ -0,0 +1,171 @@
+"""
+A/B comparison of system-prompt variants on the stored evaluation chats.
+
+    python -m engli.prompt_ab [--variant compact] [--module NAME ...] [--turns 5]
+                              [--model llama-3.3-70b-versatile] [--out rows.csv] [--dry-run]
+
+Every user turn in Evaluation/*conversation_history.json is replayed with
+the recorded conversation so far as context, once with the original system
+prompt and once with the variant. Both calls use the same model and
+temperature 0, so differences come from the prompt. The report gives the
+prompt tokens each turn saves and how far the variant's replies drift
+from the original's. --dry-run makes no API calls and only reports the
+estimated token savings.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import time
+from difflib import SequenceMatcher
+from statistics import mean
+
+from engli.cleaner import clean_action_descriptors
+from engli.prompts import COMPACT_PROMPTS, system_prompt
+
+TRANSCRIPTS = os.path.join("Evaluation", "*conversation_history.json")
+# The profile the evaluation conversations were recorded with.
+EVALUATION_PROFILE = {"name": "Enrique", "profession": "Software Engineer", "nationality": "Mexico", "age": 25}
+
+
+def load_transcripts(pattern=TRANSCRIPTS):
+    """{file stem: [message, ...]} for every stored conversation."""
+    transcripts = {}
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            transcripts[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+    return transcripts
+
+
+def user_turns(messages, limit=None):
+    """(history before the turn, user text) for each user message."""
+    turns = []
+    for index, message in enumerate(messages):
+        if message["role"] == "user":
+            turns.append((messages[:index], message["content"]))
+            if limit is not None and len(turns) == limit:
+                break
+    return turns
+
+
+def drift(baseline, candidate):
+    """0 when the replies are word-for-word the same, 1 when nothing matches."""
+    return 1.0 - SequenceMatcher(None, baseline.split(), candidate.split()).ratio()
+
+
+def has_action_descriptors(reply):
+    """Whether the reply breaks the "no action descriptors" rule."""
+    return clean_action_descriptors(reply) != " ".join(reply.split())
+
+
+def ask(client, model, system, history, text):
+    messages = [{"role": "system", "content": system}, *history, {"role": "user", "content": text}]
+    started = time.perf_counter()
+    completion = client.chat.completions.create(
+        model=model, messages=messages, temperature=0, max_tokens=1024, top_p=1,
+    )
+    latency = time.perf_counter() - started
+    return completion.choices[0].message.content or "", completion.usage.prompt_tokens, latency
+
+
+def compare(client, model, module, variant, transcripts, turns=None):
+    """One row per replayed turn with both replies, their token counts and drift."""
+    baseline_prompt = system_prompt(module, EVALUATION_PROFILE).text
+    candidate_prompt = system_prompt(module, EVALUATION_PROFILE, variant).text
+    rows = []
+    for name, messages in transcripts.items():
+        for index, (history, text) in enumerate(user_turns(messages, turns)):
+            baseline, baseline_tokens, baseline_latency = ask(client, model, baseline_prompt, history, text)
+            candidate, candidate_tokens, candidate_latency = ask(client, model, candidate_prompt, history, text)
+            rows.append({
+                "module": module,
+                "transcript": name,
+                "turn": index,
+                "baseline_prompt_tokens": baseline_tokens,
+                "candidate_prompt_tokens": candidate_tokens,
+                "baseline_latency": round(baseline_latency, 3),
+                "candidate_latency": round(candidate_latency, 3),
+                "baseline_words": len(baseline.split()),
+                "candidate_words": len(candidate.split()),
+                "baseline_descriptors": has_action_descriptors(baseline),
+                "candidate_descriptors": has_action_descriptors(candidate),
+                "drift": round(drift(baseline, candidate), 3),
+                "baseline": baseline,
+                "candidate": candidate,
+            })
+    return rows
+
+
+def summarize(rows):
+    """Per-module averages of the rows from `compare`."""
+    summary = {}
+    for module in dict.fromkeys(row["module"] for row in rows):
+        module_rows = [row for row in rows if row["module"] == module]
+        summary[module] = {
+            "turns": len(module_rows),
+            "prompt_tokens_saved": round(mean(r["baseline_prompt_tokens"] - r["candidate_prompt_tokens"] for r in module_rows), 1),
+            "latency_saved": round(mean(r["baseline_latency"] - r["candidate_latency"] for r in module_rows), 3),
+            "mean_drift": round(mean(r["drift"] for r in module_rows), 3),
+            "max_drift": max(r["drift"] for r in module_rows),
+            "reply_length_ratio": round(sum(r["candidate_words"] for r in module_rows) / max(1, sum(r["baseline_words"] for r in module_rows)), 2),
+            "descriptor_replies": (
+                sum(r["baseline_descriptors"] for r in module_rows),
+                sum(r["candidate_descriptors"] for r in module_rows),
+            ),
+        }
+    return summary
+
+
+def estimate_savings(modules, variant, transcripts, turns=None):
+    """Estimated prompt tokens saved per turn and over the stored conversations, without API calls."""
+    replayed = sum(len(user_turns(messages, turns)) for messages in transcripts.values())
+    estimates = {}
+    for module in modules:
+        baseline = system_prompt(module, EVALUATION_PROFILE).tokens
+        candidate = system_prompt(module, EVALUATION_PROFILE, variant).tokens
+        estimates[module] = {
+            "original_tokens": baseline,
+            "variant_tokens": candidate,
+            "saved_per_turn": baseline - candidate,
+            "saved_percent": round(100 * (baseline - candidate) / baseline, 1) if baseline else 0.0,
+            "saved_over_transcripts": (baseline - candidate) * replayed,
+        }
+    return estimates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a system-prompt variant with the original prompts.")
+    parser.add_argument("--variant", default="compact")
+    parser.add_argument("--module", action="append", help="module to compare (default: every module with a compact prompt)")
+    parser.add_argument("--model", default="llama-3.3-70b-versatile")
+    parser.add_argument("--turns", type=int, default=None, help="user turns replayed per transcript")
+    parser.add_argument("--transcripts", default=TRANSCRIPTS)
+    parser.add_argument("--out", help="write every compared turn to this CSV file")
+    parser.add_argument("--dry-run", action="store_true", help="only estimate token savings; no API calls")
+    args = parser.parse_args(argv)
+
+    modules = args.module or list(COMPACT_PROMPTS)
+    transcripts = load_transcripts(args.transcripts)
+    if args.dry_run:
+        for module, estimate in estimate_savings(modules, args.variant, transcripts, args.turns).items():
+            print(f"{module}: {json.dumps(estimate)}")
+        return
+
+    from groq import Groq
+
+    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    rows = []
+    for module in modules:
+        rows.extend(compare(client, args.model, module, args.variant, transcripts, args.turns))
+    for module, summary in summarize(rows).items():
+        print(f"{module}: {json.dumps(summary)}")
+    if args.out and rows:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
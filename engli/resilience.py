@@ -0,0 +1,254 @@
+import asyncio
+import random
+import sys
+import threading
+import time
+
+# HTTP statuses worth retrying besides 5xx: timeout, conflict, too early, rate limit.
+RETRY_STATUSES = {408, 409, 425, 429}
+
+
+class CircuitOpen(Exception):
+    """An endpoint's circuit breaker is open, so the call was not attempted."""
+
+    def __init__(self, endpoint, retry_in):
+        super().__init__(f"{endpoint} is unavailable; retrying in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+def status_of(error):
+    """HTTP status of an SDK or httpx/requests error, if it carries one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        for name in ("response", "rsp"):
+            response = getattr(error, name, None)
+            status = getattr(response, "status_code", None)
+            if status is not None:
+                break
+    return status if isinstance(status, int) else None
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After), or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retriable(error):
+    """
+    Whether a failed call may succeed if repeated: timeouts, dropped
+    connections, rate limits and server errors, but not bad requests.
+
+    SDK exception types are only checked when the SDK is already loaded,
+    so this module does not import them. Errors that wrap another one
+    (gTTS raises its own error while handling a requests timeout) are
+    judged by the error they wrap.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = status_of(error)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    groq = sys.modules.get("groq")
+    if groq is not None and isinstance(error, groq.APIConnectionError):
+        return True
+    httpx = sys.modules.get("httpx")
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    requests = sys.modules.get("requests")
+    if requests is not None and isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    wrapped = error.__cause__ or error.__context__
+    return is_retriable(wrapped) if wrapped is not None else False
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits uniform(0, base * 2**n), capped."""
+
+    def __init__(self, attempts=3, base_delay=0.25, max_delay=4.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt, error=None):
+        requested = retry_after(error)
+        if requested is not None:
+            return min(requested, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """
+    Fails fast once an endpoint keeps failing.
+
+    After `failure_threshold` consecutive retriable failures the circuit
+    opens and calls raise CircuitOpen for `reset_timeout` seconds. Then one
+    trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial or self.clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        """Raise CircuitOpen unless a call may go through now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = self.clock() - self._opened_at
+            if waited >= self.reset_timeout and not self._trial:
+                self._trial = True
+                return
+            raise CircuitOpen(self.name, max(self.reset_timeout - waited, 0.0))
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial = False
+
+
+class Resilience:
+    """
+    Retries, timeouts and a circuit breaker per external endpoint.
+
+    `call` (async) and `call_sync` run a zero-argument function, retrying
+    retriable errors with jittered backoff while the endpoint's breaker
+    allows it. Errors that are not retriable (bad requests, auth) are
+    raised at once and do not count against the breaker. Counters per
+    endpoint are available from `stats`.
+    """
+
+    def __init__(self, retry=None, timeouts=None, failure_threshold=5, reset_timeout=30.0):
+        self.retry = retry or RetryPolicy()
+        self.timeouts = timeouts or {}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._breakers = {}
+        self._counters = {}
+
+    def breaker(self, endpoint):
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+                self._counters[endpoint] = dict.fromkeys(
+                    ("calls", "successes", "failures", "retries", "timeouts", "short_circuits"), 0
+                )
+            return self._breakers[endpoint]
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            self._counters[endpoint][name] += 1
+
+    def _allow(self, endpoint):
+        breaker = self.breaker(endpoint)
+        try:
+            breaker.allow()
+        except CircuitOpen:
+            self._count(endpoint, "short_circuits")
+            raise
+        return breaker
+
+    def _failed(self, endpoint, breaker, error, attempt):
+        """Record a failure; return the backoff before retrying, or None to give up."""
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            self._count(endpoint, "timeouts")
+        if not is_retriable(error):
+            # The provider answered, so it is up as far as the breaker is concerned.
+            breaker.success()
+            self._count(endpoint, "failures")
+            return None
+        breaker.failure()
+        if attempt + 1 >= self.retry.attempts:
+            self._count(endpoint, "failures")
+            return None
+        self._count(endpoint, "retries")
+        return self.retry.backoff(attempt, error)
+
+    async def call(self, endpoint, fn, timeout=None):
+        """Await `fn()` with retries, the endpoint's timeout and its breaker."""
+        timeout = timeout if timeout is not None else self.timeouts.get(endpoint)
+        self._count_call(endpoint)
+        attempt = 0
+        while True:
+            breaker = self._allow(endpoint)
+            try:
+                result = await asyncio.wait_for(fn(), timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = self._failed(endpoint, breaker, e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            breaker.success()
+            self._count(endpoint, "successes")
+            return result
+
+    def call_sync(self, endpoint, fn):
+        """
+        Blocking counterpart of `call`.
+
+        A blocking call cannot be cut short from here, so `fn` must set the
+        endpoint's timeout (see `timeouts`) on the client it uses.
+        """
+        self._count_call(endpoint)
+        attempt = 0
+        while True:
+            breaker = self._allow(endpoint)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._failed(endpoint, breaker, e, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            breaker.success()
+            self._count(endpoint, "successes")
+            return result
+
+    def _count_call(self, endpoint):
+        self.breaker(endpoint)
+        self._count(endpoint, "calls")
+
+    def stats(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+            counters = {endpoint: dict(values) for endpoint, values in self._counters.items()}
+        return {
+            endpoint: dict(counters[endpoint], state=breaker.state)
+            for endpoint, breaker in breakers.items()
+        }
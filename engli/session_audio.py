@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+
+
+class SessionAudio:
+    """
+    Synthesized clips for one Streamlit session, kept as in-memory buffers.
+
+    Clips are handed to st.audio as bytes, so concurrent sessions never share
+    a file. Clips larger than `spill_bytes` can optionally be written to a
+    private temp folder under a unique name instead; the folder is removed
+    when clips are evicted and when the session's store is garbage collected.
+    """
+
+    def __init__(self, max_clips=50, spill_bytes=None):
+        self.max_clips = max_clips
+        self.spill_bytes = spill_bytes
+        self._clips = OrderedDict()
+        self._lock = threading.Lock()
+        self._spill_dir = None
+        self._finalizer = None
+
+    def _spill_path(self, clip_id):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="engli-audio-")
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        return os.path.join(self._spill_dir, f"{clip_id}.mp3")
+
+    def put(self, data):
+        """Store a clip and return its id, or None for empty audio."""
+        if not data:
+            return None
+        clip_id = uuid.uuid4().hex
+        if self.spill_bytes is not None and len(data) > self.spill_bytes:
+            path = self._spill_path(clip_id)
+            with open(path, "wb") as f:
+                f.write(data)
+            entry = path
+        else:
+            entry = data
+
+        with self._lock:
+            self._clips[clip_id] = entry
+            while len(self._clips) > self.max_clips:
+                _, evicted = self._clips.popitem(last=False)
+                self._remove(evicted)
+        return clip_id
+
+    def get(self, clip_id):
+        """Bytes (or a spilled file path) that st.audio can play, or None."""
+        with self._lock:
+            return self._clips.get(clip_id)
+
+    def discard(self, clip_id):
+        with self._lock:
+            entry = self._clips.pop(clip_id, None)
+        self._remove(entry)
+
+    @staticmethod
+    def _remove(entry):
+        if isinstance(entry, str):
+            try:
+                os.remove(entry)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._clips.clear()
+        if self._finalizer is not None:
+            self._finalizer()
@@ -0,0 +1,120 @@
+import re
+
+# A sentence ends at ., ! or ? (optionally followed by closing quotes or
+# brackets) once the next word has started, so "3.5" or "Mr." mid-token and
+# trailing "..." still being generated are never cut early.
+SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*\s+(?=\S)')
+
+MPEG1_BITRATES = [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320]
+MPEG2_BITRATES = [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG-1
+    2: [22050, 24000, 16000],  # MPEG-2
+    0: [11025, 12000, 8000],   # MPEG-2.5
+}
+
+
+class SentenceSplitter:
+    """
+    Cuts a growing reply into complete sentences.
+
+    `feed` takes the whole reply generated so far and returns the sentences
+    that became complete since the last call. Very short sentences ("Oh!")
+    are held and merged into the next one so each synthesized clip is worth
+    a round trip.
+    """
+
+    def __init__(self, min_chars=25):
+        self.min_chars = min_chars
+        self._offset = 0
+
+    def feed(self, text):
+        sentences = []
+        start = self._offset
+        for match in SENTENCE_END.finditer(text, self._offset):
+            candidate = text[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._offset = start
+        return sentences
+
+    def flush(self, text):
+        """Whatever is left once generation has finished."""
+        remainder = text[self._offset:].strip()
+        self._offset = len(text)
+        return [remainder] if remainder else []
+
+
+def concat_mp3(clips):
+    """Join MP3 clips; MPEG frames are self-delimiting so bytes can be appended."""
+    return b"".join(clip for clip in clips if clip)
+
+
+def mp3_duration(data):
+    """Playback length in seconds, found by walking the MPEG Layer III frames."""
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size
+
+    seconds = 0.0
+    while pos + 4 <= len(data):
+        b1, b2 = data[pos + 1], data[pos + 2]
+        if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+            pos += 1
+            continue
+        version = (b1 >> 3) & 3
+        layer = (b1 >> 1) & 3
+        bitrate_index = (b2 >> 4) & 0xF
+        rate_index = (b2 >> 2) & 3
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+
+        bitrates = MPEG1_BITRATES if version == 3 else MPEG2_BITRATES
+        bitrate = bitrates[bitrate_index] * 1000
+        sample_rate = SAMPLE_RATES[version][rate_index]
+        padding = (b2 >> 1) & 1
+        samples = 1152 if version == 3 else 576
+        frame_length = samples // 8 * bitrate // sample_rate + padding
+
+        seconds += samples / sample_rate
+        pos += frame_length
+    return seconds
+
+
+class ProgressivePlayer:
+    """
+    Keeps one audio player fed with the sentence clips that are ready.
+
+    The first clip is rendered as soon as it exists. Later clips are only
+    appended when the audio already handed to the browser is about to run
+    out, and the re-rendered player resumes from the current position so
+    the learner hears one continuous reply.
+    """
+
+    def __init__(self, render, clock, lead_seconds=1.0):
+        self._render = render
+        self._clock = clock
+        self.lead_seconds = lead_seconds
+        self.started_at = None
+        self.rendered_clips = 0
+        self.rendered_duration = 0.0
+
+    def advance(self, clips, force=False):
+        if len(clips) <= self.rendered_clips:
+            return
+        position = 0
+        if self.started_at is not None:
+            elapsed = self._clock() - self.started_at
+            if not force and elapsed < self.rendered_duration - self.lead_seconds:
+                return
+            position = int(min(elapsed, self.rendered_duration))
+
+        audio = concat_mp3(clips)
+        self._render(audio, position)
+        self.started_at = self._clock() - position
+        self.rendered_clips = len(clips)
+        self.rendered_duration = mp3_duration(audio)
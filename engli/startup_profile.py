@@ -0,0 +1,122 @@
+"""
+Where a fresh Streamlit worker spends its cold start.
+
+In the app, heavy SDKs are loaded with `timed_import` on first use and the
+first run of each page is recorded with `record_first_run`, so the
+performance panel shows what a new worker paid. From the command line,
+
+    python -m engli.startup_profile [page.py ...] [--top N]
+
+runs `python -X importtime` over each page's module-level imports in a
+clean interpreter and reports the slowest ones.
+"""
+import argparse
+import ast
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+DEFAULT_PAGES = ("app.py", os.path.join("pages", "appfunctions.py"))
+
+_lock = threading.Lock()
+_timings = {}
+
+
+def record(label, seconds):
+    """Keep the first measurement for `label`; later ones are warm and cheap."""
+    with _lock:
+        _timings.setdefault(label, round(seconds, 4))
+
+
+def timed_import(name):
+    """Import a module on first use, recording how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    record(f"import {name}", time.perf_counter() - started)
+    return module
+
+
+def record_first_run(page, started):
+    """Record the first full run of `page`, timed from `started` (perf_counter)."""
+    record(f"first run {page}", time.perf_counter() - started)
+
+
+def timings():
+    with _lock:
+        return dict(_timings)
+
+
+def page_imports(path):
+    """Top-level modules a page script imports when it is loaded."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            if name not in modules:
+                modules.append(name)
+    return modules
+
+
+def parse_importtime(stderr):
+    """
+    {module: cumulative_us} for the top-level imports in `-X importtime` output.
+
+    Nested imports are indented under the module that pulled them in and
+    are already part of its cumulative time, so they are left out.
+    """
+    report = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        if name.startswith("  "):
+            continue
+        report[name.strip()] = int(fields[1])
+    return report
+
+
+def profile_imports(modules, cwd=None):
+    """Import `modules` in a fresh interpreter and return its importtime report."""
+    code = "\n".join(f"import {name}" for name in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=cwd,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import time of each page's module-level imports.")
+    parser.add_argument("pages", nargs="*", default=list(DEFAULT_PAGES))
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list per page")
+    args = parser.parse_args(argv)
+
+    for page in args.pages:
+        modules = page_imports(page)
+        # Interpreter start-up (site, encodings) shows up too; keep the page's own imports.
+        report = {name: us for name, us in profile_imports(modules).items() if name in modules}
+        print(f"{page}: {len(modules)} imports, {sum(report.values()) / 1000:.0f} ms")
+        for name, cumulative in sorted(report.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
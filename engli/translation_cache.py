@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+
+
+class TranslationCache:
+    """
+    Two-tier cache for translations keyed by (text, target_language, model).
+
+    The hot tier is an in-process LRU shared by every Streamlit session; the
+    cold tier is a SQLite file so translations survive restarts and are
+    shared between worker processes. The file is kept to `max_disk_entries`
+    rows: every `prune_every` writes, the least recently used rows beyond
+    that are deleted.
+    """
+
+    def __init__(self, path, max_entries=2048, max_disk_entries=20000, prune_every=100):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS translations (
+                    text TEXT NOT NULL,
+                    target_language TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    last_used REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (text, target_language, model)
+                )"""
+            )
+            # Files written before rows were aged have no last_used column.
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(translations)")}
+            if "last_used" not in columns:
+                conn.execute("ALTER TABLE translations ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._prune()
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps us safe across the
+        # script threads Streamlit runs sessions on.
+        with closing(sqlite3.connect(self.path, timeout=5)) as conn, conn:
+            yield conn
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text, target_language, model):
+        key = (text, target_language.lower(), model)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT translation FROM translations WHERE text = ? AND target_language = ? AND model = ?",
+                    key,
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE translations SET last_used = ? WHERE text = ? AND target_language = ? AND model = ?",
+                        (time.time(),) + key,
+                    )
+        except sqlite3.Error:
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, text, target_language, model, translation):
+        key = (text, target_language.lower(), model)
+        with self._lock:
+            self._remember(key, translation)
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                    key + (translation, time.time()),
+                )
+        except sqlite3.Error:
+            # The in-memory tier still serves this process.
+            pass
+        if prune:
+            self._prune()
+
+    def _prune(self):
+        """Delete the least recently used rows beyond max_disk_entries."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """DELETE FROM translations WHERE rowid IN (
+                        SELECT rowid FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                    )""",
+                    (self.max_disk_entries,),
+                )
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "entries": len(self._memory),
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
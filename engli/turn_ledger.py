@@ -0,0 +1,34 @@
+import hashlib
+from collections import OrderedDict
+
+
+def recording_digest(audio_bytes):
+    """Stable identifier for a recording returned by st_audiorec."""
+    return hashlib.sha256(audio_bytes).hexdigest()
+
+
+class TurnLedger:
+    """
+    Per-session record of voice turns that have already been processed.
+
+    st_audiorec keeps returning the same WAV bytes on every rerun until a new
+    recording is made, so the page looks the recording up here before doing
+    any transcription, generation or synthesis work.
+    """
+
+    def __init__(self, max_turns=50):
+        self.max_turns = max_turns
+        self._turns = OrderedDict()
+
+    def __contains__(self, digest):
+        return digest in self._turns
+
+    def get(self, digest):
+        return self._turns.get(digest)
+
+    def record(self, digest, turn):
+        self._turns[digest] = turn
+        self._turns.move_to_end(digest)
+        while len(self._turns) > self.max_turns:
+            self._turns.popitem(last=False)
+        return turn
@@ -0,0 +1,94 @@
+import numpy as np
+
+
+def frame_energies(samples, sample_rate, frame_ms=30):
+    """RMS level of each frame in dBFS, for 16-bit mono samples."""
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    usable = len(samples) - len(samples) % frame_length
+    if usable == 0:
+        return np.zeros(0), frame_length
+    frames = samples[:usable].astype(np.float32).reshape(-1, frame_length) / 32768.0
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-6)), frame_length
+
+
+def speech_frames(energies, min_level_db=-45.0, margin_db=12.0, peak_margin_db=10.0):
+    """
+    Frames loud enough to be speech.
+
+    The threshold adapts to the recording: a frame counts as speech when it
+    is `margin_db` above the noise floor (the 10th percentile level), or at
+    least within `peak_margin_db` of the loudest frame when the recording is
+    nearly all speech, and always above an absolute `min_level_db`.
+    """
+    if len(energies) == 0:
+        return np.zeros(0, dtype=bool)
+    noise_floor = np.percentile(energies, 10)
+    threshold = min(noise_floor + margin_db, energies.max() - peak_margin_db)
+    return energies > max(threshold, min_level_db)
+
+
+def keep_mask(speech, pad_frames, max_pause_frames):
+    """
+    Frames to keep: speech plus padding, with long pauses shortened.
+
+    Leading and trailing silence is dropped entirely; inside the utterance
+    each silent run keeps at most `max_pause_frames` frames.
+    """
+    if not speech.any():
+        return np.zeros_like(speech)
+    kernel = np.ones(2 * pad_frames + 1)
+    padded = np.convolve(speech, kernel, mode="same") > 0
+
+    index = np.arange(len(padded))
+    # For every frame, the index where the current silent run began.
+    run_start = np.where(padded, index + 1, 0)
+    run_start = np.maximum.accumulate(run_start)
+    keep = padded | (index - run_start < max_pause_frames)
+
+    voiced = np.flatnonzero(padded)
+    keep[:voiced[0]] = False
+    keep[voiced[-1] + 1:] = False
+    return keep
+
+
+def trim_silence(samples, sample_rate, frame_ms=30, pad_ms=150, max_pause_ms=600):
+    """
+    Remove leading/trailing silence and collapse long pauses.
+
+    Returns the trimmed int16 samples, which are empty when the recording
+    contains no speech at all.
+    """
+    energies, frame_length = frame_energies(samples, sample_rate, frame_ms)
+    speech = speech_frames(energies)
+    keep = keep_mask(speech, pad_ms // frame_ms, max_pause_ms // frame_ms)
+    if not keep.any():
+        return samples[:0]
+    sample_mask = np.repeat(keep, frame_length)
+    # Samples past the last whole frame follow the last frame's decision.
+    tail = np.full(len(samples) - len(sample_mask), keep[-1])
+    return samples[np.concatenate([sample_mask, tail])]
+
+
+def pause_profile(samples, sample_rate, frame_ms=30, pad_ms=90):
+    """
+    (speech_seconds, pauses) of the original recording.
+
+    `pauses` lists every silent gap between the first and last speech, in
+    seconds, before trim_silence shortens them.
+    """
+    energies, _ = frame_energies(samples, sample_rate, frame_ms)
+    speech = speech_frames(energies)
+    if not speech.any():
+        return 0.0, []
+    pad_frames = pad_ms // frame_ms
+    padded = np.convolve(speech, np.ones(2 * pad_frames + 1), mode="same") > 0
+    voiced = np.flatnonzero(padded)
+    inner = padded[voiced[0]:voiced[-1] + 1].astype(np.int8)
+    # Rising/falling edges of the silent runs inside the utterance.
+    edges = np.diff(np.concatenate([[1], inner, [1]]))
+    starts = np.flatnonzero(edges == -1)
+    ends = np.flatnonzero(edges == 1)
+    frame_seconds = frame_ms / 1000
+    pauses = ((ends - starts) * frame_seconds).tolist()
+    return float(inner.sum() * frame_seconds), pauses
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+
+class StageFailed(Exception):
+    """A required stage raised or missed its deadline."""
+
+    def __init__(self, stage, reason):
+        super().__init__(f"{stage}: {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+@dataclass
+class Stage:
+    """
+    One step of a voice turn.
+
+    `run` is a coroutine function taking the TurnContext. It starts once every
+    stage named in `after` has finished, must complete within `deadline`
+    seconds, and when `optional` its failure is recorded in ctx.skipped
+    instead of failing the turn.
+    """
+
+    name: str
+    run: Callable[["TurnContext"], Awaitable[Any]]
+    deadline: Optional[float] = None
+    optional: bool = False
+    after: Tuple[str, ...] = ()
+
+
+@dataclass
+class TurnContext:
+    """
+    Inputs, results and live progress of one voice turn.
+
+    Stages run on the pipeline's event loop thread and only touch this
+    object; the Streamlit script thread polls `state` to draw partial
+    results, so nothing here may call st.* directly.
+    """
+
+    inputs: dict
+    results: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    skipped: dict = field(default_factory=dict)
+    state: dict = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class VoicePipeline:
+    """Runs a set of stages as a dependency graph on asyncio."""
+
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+
+    async def run(self, ctx):
+        tasks = {}
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(self._run_stage(stage, ctx, tasks))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            # A required stage failed or the whole turn was cancelled by a
+            # newer recording: stop everything still in flight.
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return ctx
+
+    async def _run_stage(self, stage, ctx, tasks):
+        for dependency in stage.after:
+            await asyncio.shield(tasks[dependency])
+            if dependency in ctx.skipped:
+                ctx.skipped[stage.name] = f"{dependency} skipped"
+                return None
+
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(stage.run(ctx), stage.deadline)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            reason = f"missed {stage.deadline:.1f}s deadline"
+            if not stage.optional:
+                raise StageFailed(stage.name, reason)
+            ctx.skipped[stage.name] = reason
+            return None
+        except StageFailed:
+            raise
+        except Exception as e:
+            if not stage.optional:
+                raise StageFailed(stage.name, e) from e
+            ctx.skipped[stage.name] = str(e)
+            return None
+        finally:
+            ctx.timings[stage.name] = round(time.perf_counter() - started, 3)
+
+        ctx.results[stage.name] = result
+        return result
+
+
+class PipelineRunner:
+    """
+    A process-wide asyncio loop on a daemon thread.
+
+    Streamlit script threads submit turns with `submit` and get back a
+    concurrent.futures.Future they can poll, or cancel when a newer recording
+    supersedes the turn.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="engli-pipeline", daemon=True)
+        self._thread.start()
+
+    def submit(self, pipeline, ctx):
+        return asyncio.run_coroutine_threadsafe(pipeline.run(ctx), self.loop)
@@ -1,15 +1,34 @@
 # pages/2_🎓_Main_App.py
+import time
+# Taken before the imports below, so the first-run timing includes them.
+PAGE_STARTED = time.perf_counter()
 import streamlit as st
 import os
-from deepgram import DeepgramClient, SpeakOptions
-from gtts import gTTS
-from groq import Groq
-import tempfile
-from st_audiorec import st_audiorec
 import random
-import re
 import json
-import time
+import asyncio
+import io
+from dataclasses import asdict
+from engli.audio_cache import AudioCache, audio_key
+from engli.asr_tiers import EscalationCounter, TierPolicy
+from engli.chat_html import message_html, render_message
+from engli.chunked_transcription import stitch
+from engli.cleaner import StreamingCleaner, clean_action_descriptors
+from engli.context_window import ContextWindow, ConversationSummary, estimate_tokens
+from engli.fluency import analyze as analyze_fluency_segments
+from engli.hedging import HedgePolicy, hedged
+from engli.model_router import MODEL_SPECS, ModelRouter, seed_latencies
+from engli.prompts import system_prompt
+from engli.resilience import CircuitOpen, Resilience, RetryPolicy, is_retriable
+from engli.session_audio import SessionAudio
+from engli.startup_profile import record_first_run, timed_import, timings as startup_timings
+from engli.speech_pipeline import ProgressivePlayer, SentenceSplitter, concat_mp3
+from engli.translation_cache import TranslationCache
+from engli.turn_ledger import TurnLedger, recording_digest
+from engli.voice_pipeline import PipelineRunner, Stage, StageFailed, TurnContext, VoicePipeline
+# SDKs that only some paths need (gTTS, Groq/httpx, pydub, the recorder) are
+# imported on first use with timed_import, so a cold worker loads only what
+# the chosen module actually touches.
 # Check if user details exist
 if "user_details" not in st.session_state:
     st.warning("Redirecting to the landing page. Please set up your profile.")
@@ -19,9 +38,172 @@ st.set_page_config(layout="wide", page_title="Engli - English Trainer", page_ico
 # API Keys
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
-# Initialize API clients
-client = Groq(api_key=GROQ_API_KEY)
-deepgram = DeepgramClient(DEEPGRAM_API_KEY)
+POOL_MAX_CONNECTIONS = int(os.getenv("ENGLI_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.getenv("ENGLI_POOL_MAX_KEEPALIVE", "10"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("ENGLI_POOL_KEEPALIVE_EXPIRY", "60"))
+
+# Initialize API clients once per process so every rerun of every session
+# reuses the same keep-alive connection pools.
+@st.cache_resource
+def get_api_clients():
+    ApiClients = timed_import("engli.clients").ApiClients
+    return ApiClients(
+        GROQ_API_KEY,
+        DEEPGRAM_API_KEY,
+        max_connections=POOL_MAX_CONNECTIONS,
+        max_keepalive=POOL_MAX_KEEPALIVE,
+        keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+    )
+
+TRANSLATION_CACHE_PATH = os.getenv("ENGLI_TRANSLATION_CACHE", os.path.join(".cache", "translations.sqlite3"))
+# Learners' replies are translated too, so the shared file is kept bounded.
+TRANSLATION_CACHE_ROWS = int(os.getenv("ENGLI_TRANSLATION_CACHE_ROWS", "20000"))
+AUDIO_CACHE_DIR = os.getenv("ENGLI_AUDIO_CACHE", os.path.join(".cache", "audio"))
+TTS_VOICE = "aura-angus-en"
+STREAM_RESPONSES = os.getenv("ENGLI_STREAM_RESPONSES", "1") == "1"
+PIPELINED_TTS = os.getenv("ENGLI_PIPELINED_TTS", "1") == "1"
+TTS_CONCURRENCY = int(os.getenv("ENGLI_TTS_CONCURRENCY", "3"))
+# Per-stage deadlines in seconds, measured from when each stage starts;
+# speech is measured from the first sentence, since it waits on the reply.
+STAGE_TIMEOUTS = {
+    "prepare": float(os.getenv("ENGLI_PREPARE_TIMEOUT", "10")),
+    "transcribe": float(os.getenv("ENGLI_TRANSCRIBE_TIMEOUT", "30")),
+    "respond": float(os.getenv("ENGLI_RESPOND_TIMEOUT", "60")),
+    "translation": float(os.getenv("ENGLI_TRANSLATION_TIMEOUT", "8")),
+    "speech": float(os.getenv("ENGLI_TTS_TIMEOUT", "60")),
+}
+POLL_INTERVAL = 0.05
+CONTEXT_BUDGET_TOKENS = int(os.getenv("ENGLI_CONTEXT_BUDGET", "3000"))
+CONTEXT_KEEP_TURNS = int(os.getenv("ENGLI_CONTEXT_KEEP_TURNS", "6"))
+SUMMARY_MODEL = os.getenv("ENGLI_SUMMARY_MODEL", "llama-3.1-8b-instant")
+# Latency budgets (seconds, p95) the model router picks models under; for
+# chat replies this is time to first token. Chat replies prefer
+# llama-3.3-70b-versatile and only move to a faster model when it stops
+# fitting the module's budget; translations and titles go to the cheapest
+# model that fits.
+BENCHMARK_SUMMARY = os.path.join("Evaluation", "summary.csv")
+CALL_LATENCY_BUDGETS = {
+    "translation": float(os.getenv("ENGLI_TRANSLATION_BUDGET", "1.5")),
+    "title": float(os.getenv("ENGLI_TITLE_BUDGET", "1.0")),
+}
+CHAT_LATENCY_BUDGET = float(os.getenv("ENGLI_CHAT_BUDGET", "4.0"))
+MODULE_LATENCY_BUDGETS = {
+    "English Conversation Friend": CHAT_LATENCY_BUDGET,
+    "Corporate English": CHAT_LATENCY_BUDGET + 1.0,
+    "Irish Slang": CHAT_LATENCY_BUDGET,
+}
+# Opt-in hedging: a slow chat reply (no first token yet) or translation gets
+# a duplicate request once it passes this percentile of recent latency, sent
+# to the fallback model if one is set, else the same model.
+HEDGING = os.getenv("ENGLI_HEDGING", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("ENGLI_HEDGE_PERCENTILE", "0.95"))
+HEDGE_FALLBACK_MODEL = os.getenv("ENGLI_HEDGE_FALLBACK_MODEL") or None
+# Every external call goes through engli.resilience: retriable errors (rate
+# limits, 5xx, dropped connections, timeouts) are retried with jittered
+# backoff, and an endpoint that keeps failing is short-circuited for a while.
+RETRY_ATTEMPTS = int(os.getenv("ENGLI_RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("ENGLI_RETRY_BASE_DELAY", "0.25"))
+BREAKER_FAILURES = int(os.getenv("ENGLI_BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("ENGLI_BREAKER_RESET", "30"))
+# Per-attempt timeouts in seconds; streamed chat replies count until the first token.
+CALL_TIMEOUTS = {
+    "groq.chat": float(os.getenv("ENGLI_GROQ_CHAT_TIMEOUT", "20")),
+    "groq.audio": float(os.getenv("ENGLI_GROQ_AUDIO_TIMEOUT", "20")),
+    "deepgram.speak": float(os.getenv("ENGLI_DEEPGRAM_TIMEOUT", "15")),
+    "gtts": float(os.getenv("ENGLI_GTTS_TIMEOUT", "10")),
+}
+# "original" or "compact" system prompts (see engli.prompts and engli.prompt_ab).
+PROMPT_VARIANT = os.getenv("ENGLI_PROMPT_VARIANT", "original")
+UPLOAD_FORMAT = os.getenv("ENGLI_UPLOAD_FORMAT", "flac")  # flac, opus or wav
+UPLOAD_SAMPLE_RATE = int(os.getenv("ENGLI_UPLOAD_SAMPLE_RATE", "16000"))
+TRIM_SILENCE = os.getenv("ENGLI_TRIM_SILENCE", "1") == "1"
+# Recordings longer than this are split and transcribed in parallel (0 disables).
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("ENGLI_TRANSCRIBE_CHUNK_SECONDS", "30"))
+TRANSCRIBE_CONCURRENCY = int(os.getenv("ENGLI_TRANSCRIBE_CONCURRENCY", "4"))
+# Tiered recognition: a fast Whisper pass, re-run on large-v3 only when unsure.
+TIERED_ASR = os.getenv("ENGLI_TIERED_ASR", "1") == "1"
+ASR_TIERS = TierPolicy(
+    fast_model=os.getenv("ENGLI_ASR_FAST_MODEL", "whisper-large-v3-turbo"),
+    accurate_model=os.getenv("ENGLI_ASR_ACCURATE_MODEL", "whisper-large-v3"),
+    min_avg_logprob=float(os.getenv("ENGLI_ASR_MIN_AVG_LOGPROB", "-0.7")),
+    max_no_speech_prob=float(os.getenv("ENGLI_ASR_MAX_NO_SPEECH_PROB", "0.6")),
+)
+# Clips above this size are kept in a per-session temp file instead of memory.
+AUDIO_SPILL_BYTES = int(os.getenv("ENGLI_AUDIO_SPILL_BYTES", "0")) or None
+SHOW_METRICS = os.getenv("ENGLI_SHOW_METRICS", "0") == "1"
+# The conversation panel shows this many recent messages, plus a page more
+# for each "Load older messages" click.
+HISTORY_PAGE_SIZE = int(os.getenv("ENGLI_HISTORY_PAGE_SIZE", "20"))
+CHAT_ROLES = ("user", "assistant", "assistant_translated")
+
+@st.cache_resource
+def get_translation_cache():
+    """Process-wide translation cache shared by every session."""
+    return TranslationCache(TRANSLATION_CACHE_PATH, max_disk_entries=TRANSLATION_CACHE_ROWS)
+
+@st.cache_resource
+def get_pipeline_runner():
+    """Event loop thread that runs every session's voice turns."""
+    return PipelineRunner()
+
+@st.cache_resource
+def get_escalation_counter():
+    """How often the fast speech recognition pass is re-run on large-v3."""
+    return EscalationCounter()
+
+@st.cache_resource
+def get_model_router():
+    """Process-wide model choice, seeded from the evaluation benchmark and updated from live calls."""
+    return ModelRouter(
+        seed_latencies(MODEL_SPECS, BENCHMARK_SUMMARY),
+        budgets=CALL_LATENCY_BUDGETS,
+        module_budgets=MODULE_LATENCY_BUDGETS,
+    )
+
+@st.cache_resource
+def get_resilience():
+    """Process-wide retry policy, timeouts and circuit breakers for external calls."""
+    return Resilience(
+        RetryPolicy(RETRY_ATTEMPTS, RETRY_BASE_DELAY),
+        timeouts=CALL_TIMEOUTS,
+        failure_threshold=BREAKER_FAILURES,
+        reset_timeout=BREAKER_RESET,
+    )
+
+@st.cache_resource
+def get_hedge_policy():
+    """Process-wide hedging thresholds and counters, or None when hedging is off."""
+    return HedgePolicy(percentile=HEDGE_PERCENTILE) if HEDGING else None
+
+def translation_models(router, call_type):
+    """Models a translation of `call_type` may come from: its routes, then the hedge fallback."""
+    models = list(router.candidates(call_type))
+    if HEDGE_FALLBACK_MODEL and HEDGE_FALLBACK_MODEL not in models:
+        models.append(HEDGE_FALLBACK_MODEL)
+    return models
+
+def cached_translation(cache, router, text, target_language, call_type):
+    """A cached translation from any model the call type may be routed or hedged to."""
+    for model in translation_models(router, call_type):
+        cached = cache.get(text, target_language, model)
+        if cached is not None:
+            return cached
+    return None
+
+def record_usage(router, call_type, model, started, usage):
+    """Report a finished non-streamed call's latency and token usage to the router."""
+    router.record(
+        call_type,
+        model,
+        time.perf_counter() - started,
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0,
+    )
+
+@st.cache_resource
+def get_audio_cache():
+    """Process-wide content-addressed cache of synthesized speech."""
+    return AudioCache(AUDIO_CACHE_DIR)
 
 @st.dialog("Welcome!")
 def show_level_recommendations(name, level, mother_tongue):
@@ -81,70 +263,137 @@ if "welcome_shown" not in st.session_state and "user_details" in st.session_stat
    show_level_recommendations(user_name, speaking_level, mother_tongue)
 
 # Helper function to translate text
-def translate_text(text, target_language):
+async def request_translation(clients, resilience, router, call_type, model, text, target_language):
+    started = time.perf_counter()
+    response = await resilience.call("groq.chat", lambda: clients.async_groq.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": "Translate the following text into " + target_language + ". Response should be just only the translation. Example input: Irish Slang; Example response: Argot irlandés"},
+            {"role": "user", "content": text},
+        ],
+        max_tokens=512,
+        temperature=0,
+        top_p=1,
+    ))
+    record_usage(router, call_type, model, started, response.usage)
+    return model, response.choices[0].message.content.strip()
+
+async def hedged_translation(clients, resilience, router, hedge, call_type, text, target_language):
+    """Translate on the routed model, hedging to the fallback when slow; returns (model, translation)."""
+    model = router.choose(call_type)
+    fallback = HEDGE_FALLBACK_MODEL or model
+    return await hedged(
+        hedge,
+        f"{call_type}:{model}",
+        lambda: request_translation(clients, resilience, router, call_type, model, text, target_language),
+        lambda: request_translation(clients, resilience, router, call_type, fallback, text, target_language),
+        backup_key=f"{call_type}:{fallback}",
+    )
+
+def translate_text(text, target_language, call_type="title"):
+    cache = get_translation_cache()
+    router = get_model_router()
+    cached = cached_translation(cache, router, text, target_language, call_type)
+    if cached is not None:
+        return cached
+    try:
+        # Runs on the pipeline loop so a hedged request can race the first.
+        model, translation = asyncio.run_coroutine_threadsafe(
+            hedged_translation(get_api_clients(), get_resilience(), router, get_hedge_policy(), call_type, text, target_language),
+            get_pipeline_runner().loop,
+        ).result()
+        cache.put(text, target_language, model, translation)
+        return translation
+    except Exception as e:
+        st.error(f"Translation failed: {e}")
+        return text
+
+def parse_batch_translation(content, expected):
+    """Translations from a batched reply, or None if the reply is malformed."""
+    try:
+        translations = json.loads(content).get("translations")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(translations, list) or len(translations) != expected:
+        return None
+    if not all(isinstance(t, str) and t.strip() for t in translations):
+        return None
+    return [t.strip() for t in translations]
+
+# Helper function to translate several strings in one request
+def translate_texts(texts, target_language):
+    """
+    Batched counterpart of translate_text, returning translations in order.
+
+    Cached strings are served from the translation cache; the rest go to the
+    model in a single JSON-mode call. If that answer is malformed, each
+    missing string falls back to its own translate_text call. If the call
+    itself fails (after retries, or with the circuit open), one error is
+    shown and the untranslated strings are returned.
+    """
+    cache = get_translation_cache()
+    router = get_model_router()
+    translations = [cached_translation(cache, router, text, target_language, "title") for text in texts]
+    missing = [i for i, translation in enumerate(translations) if translation is None]
+    if not missing:
+        return translations
+
+    model = router.choose("title")
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        started = time.perf_counter()
+        groq = get_api_clients().groq.with_options(timeout=CALL_TIMEOUTS["groq.chat"])
+        response = get_resilience().call_sync("groq.chat", lambda: groq.chat.completions.create(
+            model=model,
             messages=[
-                {"role": "system", "content": "Translate the following text into " + target_language + ". Response should be just only the translation. Example input: Irish Slang; Example response: Argot irlandés"},
-                {"role": "user", "content": text},
+                {"role": "system", "content": "Translate each string in the JSON array into " + target_language + ". Respond with a JSON object of the form {\"translations\": [...]} holding only the translations, in the same order and with the same number of items. Example input: [\"Irish Slang\"]; Example response: {\"translations\": [\"Argot irlandés\"]}"},
+                {"role": "user", "content": json.dumps([texts[i] for i in missing], ensure_ascii=False)},
             ],
-            max_tokens=512,
+            max_tokens=1024,
             temperature=0,
             top_p=1,
-        )
-        return response.choices[0].message.content.strip()
+            response_format={"type": "json_object"},
+        ))
     except Exception as e:
+        # Per-string calls would hit the same outage, once per title.
         st.error(f"Translation failed: {e}")
-        return text
+        for i in missing:
+            translations[i] = texts[i]
+        return translations
+    record_usage(router, "title", model, started, response.usage)
+    batch = parse_batch_translation(response.choices[0].message.content, len(missing))
+
+    if batch is None:
+        for i in missing:
+            translations[i] = translate_text(texts[i], target_language)
+        return translations
+
+    for i, translation in zip(missing, batch):
+        translations[i] = translation
+        cache.put(texts[i], target_language, model, translation)
+    return translations
 
 # Function to pronounce text using gTTS
 def pronounce_text(text):
+    cache = get_audio_cache()
+    key = audio_key(text, "en", "gtts", "mp3")
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        tts = gTTS(text)
-        os.makedirs('static', exist_ok=True)
-        tts.save("static/pronunciation.mp3")
-        return "static/pronunciation.mp3"
-    except Exception as e:
-        st.error(f"Pronunciation generation failed: {e}")
-        return None
+        tts = timed_import("gtts").gTTS(text, timeout=CALL_TIMEOUTS["gtts"])
 
-# Function to transcribe audio using Groq Whisper API
-def transcribe_audio(file_path_or_bytes, model="whisper-large-v3"):
-    try:
-        transcription = client.audio.transcriptions.create(
-            file=("recorded_audio.wav", file_path_or_bytes),
-            model=model,
-            response_format="verbose_json",
-        )
-        return transcription
+        def synthesize():
+            buffer = io.BytesIO()
+            tts.write_to_fp(buffer)
+            return buffer.getvalue()
+
+        audio_bytes = get_resilience().call_sync("gtts", synthesize)
+        cache.put(key, audio_bytes)
+        return audio_bytes
     except Exception as e:
-        st.error(f"Audio transcription failed: {e}")
+        st.error(f"Pronunciation generation failed: {e}")
         return None
 
-def clean_action_descriptors(text):
-    """
-    Remove action descriptors like (laughs), (pauses), **smiles**, etc.
-    from the text.
-    """
-    if not text:
-        return text
-
-    # Remove content within parentheses with any characters including newlines
-    text = re.sub(r'\([^)]+\)', '', text)
-        # Remove content within single and double asterisks
-    text = re.sub(r'\*\*[^*]+\*\*', '', text)
-    text = re.sub(r'\*[^*]+\*', '', text)
-        # Remove common emoji and action patterns
-    text = re.sub(r'\[[^\]]+\]', '', text)  # Remove [actions]
-    text = re.sub(r'_[^_]+_', '', text)     # Remove _actions_    
-    # Clean up any extra whitespace
-    text = re.sub(r'\s+', ' ', text)        # Replace multiple spaces with single space
-    text = re.sub(r'\s+([.,!?])', r'\1', text)  # Remove spaces before punctuation
-    text = re.sub(r'\n\s*\n', '\n', text)   # Remove extra blank lines
-    
-    return text.strip()
-
 # Add this function at the beginning of your script
 def initialize_chat_history_if_empty(module_name):
     """Initialize chat history only if it's empty or when module changes"""
@@ -156,173 +405,472 @@ def initialize_chat_history_if_empty(module_name):
     
     # Only initialize if chat history is empty or module has changed
     if len(st.session_state.chat_history) == 0 or st.session_state.current_module != module_name:
-        user_info = f"The user is; Name: {st.session_state.user_details.get('name', 'User')}, Profession: {st.session_state.user_details.get('profession', 'Unknown')}, Nationality: {st.session_state.user_details.get('nationality', 'Unknown')}, Age: {st.session_state.user_details.get('age', 'Not Specified')}"
-        
-        mother_tongue = st.session_state.user_details.get('mother_tongue', 'Any Language')
-        translation_module_name = f"{mother_tongue} to English"
-        
-        system_prompts = {
-        "English Conversation Friend": f"""You are Engli, a 28-year-old English teacher from Ireland who loves traveling and meeting new people. Your teaching style is warm and conversational.
-        
-        Role: Create an immersive, natural English learning experience through friendly conversation as we talk. Correct mistakes of the user if any.
-        
-        Conversation Style:
-        - Use natural speech patterns with pauses (...) and filler words (um, uh, well, you know)
-        - Break up longer thoughts into shorter sentences
-        - React naturally to user's responses ("Oh really?", "That's interesting!", "I see what you mean")
-        - Show authentic interest by asking follow-up questions
-        - Mirror the user's energy level and conversation pace
-        - Do not generate action descriptors in your response
-        
-        Teaching Approach:
-        - Prioritize flow and confidence
-        - When correcting, use casual restatements ("Oh, you mean...") rather than formal corrections
-        - Adjust language complexity based on user's level
-        - Introduce relevant vocabulary naturally within conversation
-        - Share personal anecdotes to demonstrate language usage
-        
-        Topics: Daily life, hobbies, travel, food, current events, work, family, or any casual conversation.
-        
-        Remember: {user_info}""",
-        
-        "Corporate English": f"""You are Engli, a 35-year-old business communication consultant with 10 years of experience in multinational companies.
-        
-        Role: Help professionals develop confident business English communication skills. Correct mistakes of the user if any.
-        
-        Communication Style:
-        - Use natural business speech patterns with appropriate pauses (...)
-        - Include professional filler words (well, actually, in fact)
-        - Demonstrate authentic business dialogue flow
-        - Balance formality with approachability
-        - Use relevant industry terminology naturally
-        - Do not generate action descriptors in your response
-        - Make the responses short
-        - Use roleplays and suggest tips.
-        
-        Teaching Focus:
-        - Email writing
-        - Meeting participation
-        - Presentations
-        - Negotiations
-        - Small talk with colleagues
-        - Professional phone conversations
-        
-        Approach:
-        - Provide context-specific language tips
-        - Share real-world examples
-        - Practice common business scenarios
-        - Give constructive feedback naturally
-        - Adjust formality based on situation
-        
-        Remember: {user_info}""",
-        
-        "Irish Slang": f"""You are Connor, a 32-year-old Dublin native who works as a tour guide and loves sharing Irish culture.
-        
-        Role: Create an authentic Irish English learning experience through storytelling and conversation.
-        
-        Speaking Style:
-        - Use natural Irish speech rhythm and intonation
-        - Include pauses (...) and Irish filler words (like, sure, grand)
-        - Incorporate common Irish expressions naturally
-        - Tell short, engaging stories about daily life in Ireland
-        - Use local slang in context
-        - Do not generate action descriptors in your response
-        - Keep your responses short
-        
-        Teaching Approach:
-        - Explain slang and expressions when used
-        - Share cultural context behind phrases
-        - Connect language to real Irish life
-        - Keep conversations casual and friendly
-        - Mix modern and traditional expressions
-        
-        Topics:
-        - Daily life in Ireland
-        - Local customs and culture
-        - Irish humor and storytelling
-        - Contemporary Irish life
-        - Personal experiences
-        
-        Remember: {user_info}""",
-        
-        f"{translation_module_name}": """Role: Precise and natural English translator
-        
-        Translation Guidelines:
-        - Maintain original meaning and context
-        - Adapt idioms appropriately
-        - Preserve tone and style
-        - Consider cultural nuances
-        - Output only the translation without explanations
-        """
-     }
-
-        
+        # Rendered once per module and profile, then served from the registry's cache.
+        prompt = system_prompt(module_name, st.session_state.user_details, PROMPT_VARIANT)
         st.session_state.chat_history = [
-            {"role": "system", "content": system_prompts.get(module_name, "")}
+            {"role": "system", "content": prompt.text}
         ]
+        st.session_state.conversation_summary = ConversationSummary()
         st.session_state.current_module = module_name
 
-# Replace the generate_response function with this updated version
-def generate_response(text, target_language):
+# Voice turn stages. These run on the pipeline's event loop thread, so they
+# only read clients and settings from ctx.inputs and never call st.* directly.
+async def prepare_audio(ctx):
+    """Trim silence, downmix, resample and compress the recording off the event loop."""
+    wav_bytes = ctx.inputs["audio"]
+    # pydub and NumPy load on the first voice turn, off the event loop.
+    audio = await asyncio.to_thread(timed_import, "engli.audio_preprocess")
     try:
-        # Initialize chat history if needed
-        if len(st.session_state.chat_history) == 0:
-            st.session_state.chat_history.append({
-                "role": "system", 
-                "content": "You are Engli, an AI English trainer."
-            })
-        
-        # Create a copy of chat history for API call
-        api_messages = [
-            msg for msg in st.session_state.chat_history 
-            if msg["role"] in ["system", "user", "assistant"]
-        ]
-        
+        prepared = await asyncio.to_thread(
+            audio.prepare_for_upload, wav_bytes, UPLOAD_SAMPLE_RATE, UPLOAD_FORMAT, TRIM_SILENCE, TRANSCRIBE_CHUNK_SECONDS or None
+        )
+    except audio.EmptyRecording:
+        # Silent clip: fail the turn here so no Whisper or LLM call is made.
+        raise
+    except Exception:
+        # Unreadable by pydub; upload the recording untouched.
+        prepared = audio.PreparedAudio([audio.UploadChunk("recorded_audio.wav", wav_bytes)], len(wav_bytes), 0.0)
+    ctx.timings["upload_bytes"] = prepared.upload_bytes
+    ctx.timings["upload_chunks"] = len(prepared.chunks)
+    ctx.timings["upload_bytes_saved"] = prepared.bytes_saved
+    ctx.timings["silence_trimmed"] = round(prepared.trimmed_seconds, 2)
+    return prepared
+
+async def transcribe_audio(ctx, model="whisper-large-v3"):
+    """
+    Transcribe the prepared recording, one request per chunk in parallel.
+
+    In tiered mode each chunk first goes to the fast Whisper model and is
+    only re-run on `model` when the segment confidence is too low. Chunk
+    results are stitched back into a single Transcript with timestamps
+    relative to the whole recording, so a long answer takes about as long
+    as its slowest chunk. A chunk that fails with a transient error on
+    another model is retried once on the accurate model. A chunk that
+    still fails is left out and counted in ctx.timings["transcribe_gaps"];
+    the turn only fails when no chunk was transcribed.
+    """
+    prepared = ctx.results["prepare"]
+    limit = asyncio.Semaphore(TRANSCRIBE_CONCURRENCY)
+    counter = ctx.inputs["escalations"]
+    models_used = set()
+
+    async def request(chunk, chunk_model, tried):
+        models_used.add(chunk_model)
+        tried.append(chunk_model)
+        return await ctx.inputs["resilience"].call("groq.audio", lambda: ctx.inputs["clients"].async_groq.audio.transcriptions.create(
+            file=(chunk.filename, chunk.data),
+            model=chunk_model,
+            response_format="verbose_json",
+        ))
+
+    async def transcribe_chunk(chunk, tried):
+        async with limit:
+            if not ctx.inputs["tiered_asr"]:
+                return await request(chunk, model, tried)
+            result = await request(chunk, ASR_TIERS.fast_model, tried)
+            escalate = ASR_TIERS.should_escalate(result)
+            counter.record(escalate)
+            if escalate:
+                ctx.timings["asr_escalations"] = ctx.timings.get("asr_escalations", 0) + 1
+                result = await request(chunk, ASR_TIERS.accurate_model, tried)
+            return result
+
+    async def transcribe_or_retry(chunk):
+        tried = []
+        try:
+            return await transcribe_chunk(chunk, tried)
+        except Exception as e:
+            # Resilience has already retried the same request, so only a
+            # different model is worth a try, and only for transient errors.
+            if not is_retriable(e) or tried[-1] == ASR_TIERS.accurate_model:
+                raise
+            async with limit:
+                return await request(chunk, ASR_TIERS.accurate_model, tried)
+
+    outcomes = await asyncio.gather(
+        *(transcribe_or_retry(chunk) for chunk in prepared.chunks), return_exceptions=True
+    )
+    transcribed = [
+        (result, chunk.offset) for result, chunk in zip(outcomes, prepared.chunks)
+        if not isinstance(result, BaseException)
+    ]
+    if not transcribed:
+        raise outcomes[0]
+    if len(transcribed) < len(outcomes):
+        ctx.timings["transcribe_gaps"] = len(outcomes) - len(transcribed)
+    results, offsets = zip(*transcribed)
+    transcription = stitch(results, offsets, "+".join(sorted(models_used)))
+    ctx.state["transcript"] = transcription.text
+    return transcription
+
+async def analyze_fluency(ctx):
+    """Speaking rate, pauses, fillers and unclear words, computed locally."""
+    prepared = ctx.results["prepare"]
+    report = analyze_fluency_segments(
+        ctx.results["transcribe"].segments,
+        speech_seconds=prepared.speech_seconds,
+        pauses=prepared.pauses if prepared.speech_seconds is not None else None,
+    )
+    return asdict(report)
+
+async def generate_response(ctx):
+    """
+    Stream Engli's reply to the transcription.
+
+    The cleaned reply so far is published in ctx.state["reply"] as tokens
+    arrive, and complete sentences are queued for the speech stage.
+    """
+    sentences = ctx.inputs["sentences"]
+    splitter = SentenceSplitter() if ctx.inputs["pipelined"] else None
+    reply = ""
+    try:
+        # System prompt, rolling summary and recent turns, within the token budget
+        api_messages = list(ctx.inputs["messages"])
+        if not api_messages:
+            api_messages.append({"role": "system", "content": "You are Engli, an AI English trainer."})
         # Add the new user message
-        api_messages.append({"role": "user", "content": text})
-        # Record the start time
-        # start_time = time.time()
-        
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=api_messages,
-            temperature=1,
-            max_tokens=1024,
-            top_p=1,
-            stream=False
+        api_messages.append({"role": "user", "content": ctx.results["transcribe"].text})
+
+        clients = ctx.inputs["clients"]
+        stream = ctx.inputs["stream"]
+
+        async def open_reply(model):
+            """Start a completion; when streaming, return once its first token arrives."""
+            completion = await clients.async_groq.chat.completions.create(
+                model=model,
+                messages=api_messages,
+                temperature=1,
+                max_tokens=1024,
+                top_p=1,
+                stream=stream
+            )
+            if not stream:
+                return model, completion, None, None
+            chunks = completion.__aiter__()
+            try:
+                async for chunk in chunks:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        return model, completion, chunks, delta
+            except asyncio.CancelledError:
+                # Lost a hedged race: release the connection.
+                await completion.close()
+                raise
+            return model, completion, chunks, ""
+
+        async def close_reply(opened):
+            if stream:
+                await opened[1].close()
+
+        start_time = time.perf_counter()
+        chat_model = ctx.inputs["chat_model"]
+        fallback_model = HEDGE_FALLBACK_MODEL or chat_model
+        resilience = ctx.inputs["resilience"]
+        model, completion, chunks, first_delta = await hedged(
+            ctx.inputs["hedge"],
+            f"chat:{chat_model}",
+            lambda: resilience.call("groq.chat", lambda: open_reply(chat_model)),
+            lambda: resilience.call("groq.chat", lambda: open_reply(fallback_model)),
+            discard=close_reply,
+            backup_key=f"chat:{fallback_model}",
         )
-        assistant_response = completion.choices[0].message.content
-        cleaned_response = clean_action_descriptors(assistant_response)
-        st.session_state.chat_history.append({"role": "user", "content": text})
-        st.session_state.chat_history.append({"role": "assistant", "content": cleaned_response})
-        
-        # Generate and store translation
-        translated_response = translate_text(cleaned_response, target_language)
+        first_token_time = time.perf_counter()
+        ctx.timings["chat_model"] = model
+        if stream:
+            # Clean text is appended as it becomes safe, so the reply shown
+            # and handed to the splitter only ever grows.
+            cleaner = StreamingCleaner()
+
+            async def publish(delta):
+                ctx.state["reply"] += cleaner.feed(delta)
+                if splitter is not None:
+                    for sentence in splitter.feed(ctx.state["reply"]):
+                        sentences.put_nowait(sentence)
+
+            await publish(first_delta)
+            async for chunk in chunks:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    await publish(delta)
+            reply = ctx.state["reply"] + cleaner.flush()
+        else:
+            reply = clean_action_descriptors(completion.choices[0].message.content)
+        end_time = time.perf_counter()
+        ctx.timings["ttft"] = round((first_token_time or end_time) - start_time, 3)
+        ctx.timings["generation"] = round(end_time - start_time, 3)
+        # Streamed replies carry no usage block, so their tokens are estimated.
+        # Chat budgets are for time to first token, so reply length does not
+        # count against the model.
+        ctx.inputs["router"].record(
+            "chat",
+            model,
+            first_token_time - start_time,
+            ctx.timings.get("context_tokens", 0),
+            estimate_tokens(reply),
+        )
+
+        ctx.state["reply"] = reply
+        return reply
+    finally:
+        # Whatever happened, let the speech stage finish with what it has.
+        # The queue is unbounded, so this never waits on a speech stage that
+        # has already given up.
+        remainder = splitter.flush(reply) if splitter is not None else ([reply] if reply else [])
+        for sentence in remainder:
+            sentences.put_nowait(sentence)
+        sentences.put_nowait(None)
+
+async def translate_text_async(ctx):
+    reply = ctx.results["respond"]
+    target_language = ctx.inputs["target_language"]
+    cache = ctx.inputs["translation_cache"]
+    router = ctx.inputs["router"]
+    # Cache lookups hit SQLite, so they run off the shared event loop.
+    cached = await asyncio.to_thread(cached_translation, cache, router, reply, target_language, "translation")
+    if cached is not None:
+        return cached
+    model, translation = await hedged_translation(
+        ctx.inputs["clients"], ctx.inputs["resilience"], router, ctx.inputs["hedge"], "translation", reply, target_language
+    )
+    ctx.timings["translation_model"] = model
+    await asyncio.to_thread(cache.put, reply, target_language, model, translation)
+    return translation
+
+# Function to synthesize speech using Deepgram TTS
+async def deepgram_tts(ctx, text):
+    cache = ctx.inputs["audio_cache"]
+    key = audio_key(text, TTS_VOICE, "deepgram", "mp3")
+    # Disk reads and writes run off the shared event loop.
+    cached = await asyncio.to_thread(cache.get, key)
+    if cached is not None:
+        return cached
+    # voice = "aura-angus-en" if module == "Irish Slang" else "aura-asteria-en"
+    audio_bytes = await ctx.inputs["resilience"].call("deepgram.speak", lambda: ctx.inputs["clients"].aspeak(text, TTS_VOICE))
+    await asyncio.to_thread(cache.put, key, audio_bytes)
+    return audio_bytes
+
+async def speak_reply(ctx):
+    """
+    Synthesize queued sentences concurrently, publishing clips in order.
+
+    The stage starts with the reply, so its deadline only runs from the
+    first sentence; the wait for the model is covered by the respond stage.
+    """
+    sentences = ctx.inputs["sentences"]
+    clips = ctx.state["clips"]
+    limit = asyncio.Semaphore(TTS_CONCURRENCY)
+    tasks = []
+
+    async def synthesize(index, sentence):
+        async with limit:
+            clips[index] = await deepgram_tts(ctx, sentence)
+        return clips[index]
+
+    async def synthesize_all(sentence):
+        while sentence is not None:
+            clips.append(None)
+            tasks.append(asyncio.ensure_future(synthesize(len(tasks), sentence)))
+            sentence = await sentences.get()
+        return concat_mp3(await asyncio.gather(*tasks))
+
+    first = await sentences.get()
+    try:
+        return await asyncio.wait_for(synthesize_all(first), STAGE_TIMEOUTS["speech"])
+    except asyncio.TimeoutError:
+        raise RuntimeError(f"missed {STAGE_TIMEOUTS['speech']:.1f}s deadline") from None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def update_conversation_summary(clients, resilience, summary, overflow, covered):
+    """Fold turns that left the context window into the rolling summary."""
+    new_text = None
+    try:
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in overflow)
+        response = await resilience.call("groq.chat", lambda: clients.async_groq.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[
+                {"role": "system", "content": "You keep a running summary of an English practice conversation between a learner (user) and their tutor Engli (assistant). Merge the new exchanges into the existing summary, keeping facts about the learner, topics discussed and mistakes corrected. Reply with the updated summary only, in under 150 words."},
+                {"role": "user", "content": f"Existing summary:\n{summary.text or '(none)'}\n\nNew exchanges:\n{transcript}"},
+            ],
+            max_tokens=300,
+            temperature=0,
+        ))
+        new_text = response.choices[0].message.content.strip()
+    except Exception:
+        # Keep the old summary; the same turns are retried on the next turn.
+        pass
+    finally:
+        summary.finish_update(new_text, covered)
+
+def build_voice_pipeline():
+    """prepare → transcribe → (fluency ∥ respond → (translate ∥ speak)), with per-stage deadlines."""
+    return VoicePipeline([
+        Stage("prepare", prepare_audio, deadline=STAGE_TIMEOUTS["prepare"]),
+        Stage("transcribe", transcribe_audio, deadline=STAGE_TIMEOUTS["transcribe"], after=("prepare",)),
+        Stage("respond", generate_response, deadline=STAGE_TIMEOUTS["respond"], after=("transcribe",)),
+        Stage("fluency", analyze_fluency, deadline=5, optional=True, after=("transcribe",)),
+        # speak_reply applies STAGE_TIMEOUTS["speech"] itself, from the first sentence.
+        Stage("speech", speak_reply, optional=True, after=("transcribe",)),
+        Stage("translation", translate_text_async, deadline=STAGE_TIMEOUTS["translation"], optional=True, after=("respond",)),
+    ])
+
+def load_older_messages():
+    st.session_state.history_pages += 1
+
+def recent_messages(history, limit):
+    """
+    Up to `limit` chat messages, newest first, and whether older ones remain.
+
+    Walks the history from the end, so the cost depends on the window size
+    rather than on how long the conversation has grown.
+    """
+    shown = []
+    for message in reversed(history):
+        if message["role"] not in CHAT_ROLES:
+            continue
+        if len(shown) == limit:
+            return shown, True
+        shown.append(message)
+    return shown, False
+
+def describe_fluency(fluency):
+    """One-line fluency feedback shown under the transcript."""
+    parts = [
+        f"🗣️ {fluency['speaking_rate']:.0f} words/min",
+        f"pauses {fluency['pause_ratio']:.0%}",
+        f"{fluency['fillers']} filler{'s' if fluency['fillers'] != 1 else ''}",
+    ]
+    if fluency["long_pauses"]:
+        parts.append(f"{fluency['long_pauses']} long pause{'s' if fluency['long_pauses'] != 1 else ''}")
+    line = " · ".join(parts)
+    if fluency["low_confidence_words"]:
+        line += " · unclear: " + ", ".join(fluency["low_confidence_words"][:8])
+    return line
+
+def start_voice_turn(digest, wav_audio_data, target_language):
+    """Submit a recording to the shared pipeline loop and remember it as in flight."""
+    runner = get_pipeline_runner()
+    api_clients = get_api_clients()
+    summary = st.session_state.conversation_summary
+    window = ContextWindow(CONTEXT_BUDGET_TOKENS, CONTEXT_KEEP_TURNS)
+    messages, overflow, window_start = window.build(st.session_state.chat_history, summary)
+    context_tokens = window.used_tokens(messages)
+    router = get_model_router()
+    if overflow and summary.begin_update():
+        asyncio.run_coroutine_threadsafe(
+            update_conversation_summary(api_clients, get_resilience(), summary, overflow, window_start), runner.loop
+        )
+
+    ctx = TurnContext(inputs={
+        "audio": wav_audio_data,
+        "target_language": target_language,
+        "messages": messages,
+        "clients": api_clients,
+        "escalations": get_escalation_counter(),
+        "tiered_asr": TIERED_ASR,
+        "translation_cache": get_translation_cache(),
+        "audio_cache": get_audio_cache(),
+        "stream": STREAM_RESPONSES,
+        "pipelined": STREAM_RESPONSES and PIPELINED_TTS,
+        "sentences": asyncio.Queue(),
+        "router": router,
+        "chat_model": router.choose("chat", st.session_state.current_module, context_tokens),
+        "hedge": get_hedge_policy(),
+        "resilience": get_resilience(),
+    })
+    ctx.state.update(transcript=None, reply="", clips=[])
+    ctx.timings["context_tokens"] = context_tokens
+    ctx.timings["chat_model"] = ctx.inputs["chat_model"]
+    api_clients.touch()
+    future = runner.submit(build_voice_pipeline(), ctx)
+    st.session_state.active_turn = {"digest": digest, "ctx": ctx, "future": future}
+    return st.session_state.active_turn
+
+def commit_voice_turn(active):
+    """Fold a finished pipeline run into chat_history and the turn ledger."""
+    ctx = active["ctx"]
+    st.session_state.active_turn = None
+    try:
+        active["future"].result()
+    except Exception as e:
+        # Failed turns are recorded too, so a rerun does not pay for the
+        # same recording again.
+        if isinstance(e, StageFailed) and isinstance(e.reason, timed_import("engli.audio_preprocess").EmptyRecording):
+            error = "I couldn't hear anything in that recording. Please try again."
+        elif isinstance(e, StageFailed) and isinstance(e.reason, CircuitOpen):
+            error = f"{e.stage.capitalize()} is temporarily unavailable. Please try again in {e.reason.retry_in:.0f} seconds."
+        elif isinstance(e, StageFailed):
+            error = f"{e.stage.capitalize()} failed: {e.reason}"
+        else:
+            error = f"Voice turn failed: {e}"
+        return st.session_state.turn_ledger.record(active["digest"], {"error": error})
+
+    transcript = ctx.results["transcribe"].text
+    response = ctx.results["respond"]
+    translated_response = ctx.results.get("translation")
+    st.session_state.chat_history.append({"role": "user", "content": transcript})
+    st.session_state.chat_history.append({"role": "assistant", "content": response})
+    if translated_response is not None:
         st.session_state.chat_history.append({
             "role": "assistant_translated", 
             "content": translated_response
         })
-        
-        return cleaned_response, translated_response
-        
-    except Exception as e:
-        st.error(f"Response generation failed: {e}")
-        return "Sorry, I'm having trouble generating a response right now.", None
 
-# Function to play audio using Deepgram TTS
-def deepgram_tts(text, output_path="output_audio.mp3", module=None):
-    try:
-        #options = SpeakOptions(model="aura-angus-en" if module == "Irish Slang" else "aura-asteria-en")
-        options = SpeakOptions(model="aura-angus-en")
-        audio_folder = os.path.join("static", "audio")
-        if not os.path.exists(audio_folder):
-            os.makedirs(audio_folder)
-        filename = os.path.join(audio_folder, output_path)
-        deepgram.speak.v("1").save(filename, {"text": text}, options)
-        return filename
-    except Exception as e:
-        st.error(f"TTS generation failed: {e}")
-        return None
+    timings = dict(ctx.timings, streamed=ctx.inputs["stream"], skipped=dict(ctx.skipped))
+    st.session_state.response_timings.append(timings)
+    turn = {
+        "transcription": transcript,
+        "response": response,
+        "translation": translated_response,
+        "fluency": ctx.results.get("fluency"),
+        "audio": st.session_state.session_audio.put(ctx.results.get("speech")),
+        "timings": timings,
+    }
+    return st.session_state.turn_ledger.record(active["digest"], turn)
+
+def follow_voice_turn(active, live_reply, said_slot, audio_slot):
+    """
+    Draw an in-flight turn's progress until the pipeline finishes.
+
+    The reply streams into the conversation panel and sentence clips start
+    playing as soon as they are ready. If a rerun interrupts this loop, the
+    next run picks the same turn back up from ctx.state.
+    """
+    ctx = active["ctx"]
+    player = ProgressivePlayer(
+        lambda audio, position: audio_slot.audio(audio, format="audio/mp3", start_time=position, autoplay=True),
+        time.perf_counter,
+    )
+    shown_transcript = None
+    shown_reply = ""
+    while True:
+        finished = active["future"].done()
+        if ctx.state["transcript"] != shown_transcript:
+            shown_transcript = ctx.state["transcript"]
+            said_slot.success(f"You said: {shown_transcript}")
+        if ctx.state["reply"] != shown_reply:
+            shown_reply = ctx.state["reply"]
+            # Partial replies are drawn once each, so they bypass the cache.
+            live_reply.markdown(message_html("assistant", shown_reply), unsafe_allow_html=True)
+
+        ready = []
+        for clip in ctx.state["clips"]:
+            if clip is None:
+                break
+            ready.append(clip)
+        player.advance(ready, force=finished)
+        if player.started_at is not None and "time_to_first_audio" not in ctx.timings:
+            ctx.timings["time_to_first_audio"] = round(ctx.elapsed(), 3)
+
+        if finished:
+            break
+        time.sleep(POLL_INTERVAL)
+
+    turn = commit_voice_turn(active)
+    if turn.get("error"):
+        st.error(turn["error"])
+    return turn
 
 # Initialize session state
 if "chat_history" not in st.session_state:
@@ -331,11 +879,21 @@ if "user_details" not in st.session_state:
     st.session_state.user_details = {}
 if "translations" not in st.session_state:
     st.session_state.translations = {}
+if "turn_ledger" not in st.session_state:
+    st.session_state.turn_ledger = TurnLedger()
+if "response_timings" not in st.session_state:
+    st.session_state.response_timings = []
+if "session_audio" not in st.session_state:
+    st.session_state.session_audio = SessionAudio(spill_bytes=AUDIO_SPILL_BYTES)
+if "conversation_summary" not in st.session_state:
+    st.session_state.conversation_summary = ConversationSummary()
+if "history_pages" not in st.session_state:
+    st.session_state.history_pages = 1
 
-# Sidebar Layout
-with st.sidebar:
-    st.markdown("## 🌍 Engli Language Trainer")
-
+# Sidebar fragments rerun on their own, so opening the profile or the
+# learning path does not redraw the conversation.
+@st.fragment
+def sidebar_profile():
     # Changed expanded=True to expanded=False to hide by default
     with st.expander("👤 User Profile", expanded=False):
         # Display current profile info (read-only)
@@ -353,6 +911,34 @@ with st.sidebar:
     st.markdown("---")
     if st.button("📚 View My Learning Path", type="secondary"):
         view_learning_path()
+
+@st.fragment
+def sidebar_metrics():
+    with st.expander("📈 Performance", expanded=False):
+        st.button("Refresh", key="refresh_metrics")
+        st.markdown("**Translation cache**")
+        st.json(get_translation_cache().stats())
+        st.markdown("**Audio cache**")
+        st.json(get_audio_cache().stats())
+        st.markdown("**Models (live latency and cost)**")
+        st.json(get_model_router().stats())
+        st.markdown("**External calls**")
+        st.json(get_resilience().stats())
+        if HEDGING:
+            st.markdown("**Hedged requests**")
+            st.json(get_hedge_policy().stats())
+        st.markdown("**Speech recognition tiers**")
+        st.json(get_escalation_counter().stats())
+        st.markdown("**Worker start-up (s)**")
+        st.json(startup_timings())
+        if st.session_state.response_timings:
+            st.markdown("**Last reply**")
+            st.json(st.session_state.response_timings[-1])
+
+# Sidebar Layout
+with st.sidebar:
+    st.markdown("## 🌍 Engli Language Trainer")
+    sidebar_profile()
    
     mother_tongue = st.session_state.user_details.get('mother_tongue', 'Any Language')
     translation_module_name = f"{mother_tongue} to English"
@@ -361,8 +947,8 @@ with st.sidebar:
     if mother_tongue.lower() != "english":
         base_modules = ["English Conversation Friend", "Corporate English", "Irish Slang", "Pronunciation Checker"]
         titles_to_translate = base_modules  # Remove translation module from translation list
-        for title in titles_to_translate:
-            st.session_state.translations[title] = translate_text(title, mother_tongue)
+        translated_titles = translate_texts(titles_to_translate, mother_tongue)
+        st.session_state.translations.update(zip(titles_to_translate, translated_titles))
 
     st.markdown("---")
 
@@ -374,6 +960,7 @@ with st.sidebar:
     # Add translation module without translation
     module_titles = base_modules + [translation_module_name]
 
+    # Changing module redraws the whole page, since title, prompt and panels all change.
     module = st.radio(
         "🚀 Choose Your Learning Mode",
         module_titles,
@@ -385,9 +972,13 @@ with st.sidebar:
     if st.button("Reset Conversation"):
         if "chat_history" in st.session_state:
             del st.session_state["chat_history"]
+        st.session_state.history_pages = 1
         # if "user_details" in st.session_state:
         #     del st.session_state["user_details"]
         st.success("Conversation reset successfully!")
+
+    if SHOW_METRICS:
+        sidebar_metrics()
 # Main App Title
 selected_module = module.split(" / ")[0] if "/" in module else module  # Handle both formats
 # Only translate title for non-translation modules
@@ -400,99 +991,120 @@ else:
 # initialize_chat_history(selected_module)
 initialize_chat_history_if_empty(selected_module)
 
-# Interaction Modules
-left_col, right_col = st.columns([1, 2])
+# Add custom CSS for better chat display. It lives outside the fragments, so
+# it is injected once per full run rather than on every new turn.
+st.markdown("""
+    <style>
+    .chat-message {
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin-bottom: 1rem;
+        white-space: pre-wrap;
+        word-wrap: break-word;
+        color: #3A3B3C;
+    }
+    .user-message {
+        background-color: #f0f2f6;
+        margin-left: 20%;
+        text-align: right;
+    }
+    .assistant-message {
+        background-color: #e6f3e6;
+        margin-right: 20%;
+        text-align: left;
+    }
+    .translated-message {
+        background-color: #f5f5f5;
+        margin-right: 20%;
+        text-align: left;
+        font-style: italic;
+    }
+    </style>
+""", unsafe_allow_html=True)
 
-if selected_module == "Pronunciation Checker":
+# Interaction Modules
+@st.fragment
+def pronunciation_checker():
+    left_col, right_col = st.columns([1, 2])
     left_col.subheader("\U0001f50a Pronunciation Checker")
     text_to_pronounce = left_col.text_input("Enter text for pronunciation:", value="Mortgage")
     if text_to_pronounce:
-        audio_file = pronounce_text(text_to_pronounce)
-        if audio_file:
-            left_col.audio(audio_file, format="audio/mp3", autoplay=True)
+        audio_bytes = pronounce_text(text_to_pronounce)
+        if audio_bytes:
+            left_col.audio(audio_bytes, format="audio/mp3", autoplay=True)
+
+@st.fragment
+def voice_session(mother_tongue):
+    """
+    Recorder and conversation panel.
+
+    A new recording reruns only this fragment: the sidebar, title and CSS
+    are left as they are.
+    """
+    left_col, right_col = st.columns([1, 2])
+    with right_col:
+        st.markdown("### 💬 Conversation")
+        # Streamed replies are drawn here while the model is still generating.
+        live_reply = st.empty()
 
-else:
     with left_col:
         st.markdown("### 🎙️ Voice Interaction")
         st.info("**Record and say Hello to start**")
-        wav_audio_data = st_audiorec()
+        wav_audio_data = timed_import("st_audiorec").st_audiorec()
+        # Open connections while the learner is still speaking.
+        get_api_clients().warm_if_idle(get_pipeline_runner().loop)
 
         if wav_audio_data is not None:
-            with st.spinner('Processing your audio...'):
-                transcription = transcribe_audio(wav_audio_data)
-                transcription_text = transcription.text
-
-                st.success(f"You said: {transcription_text}")
+            digest = recording_digest(wav_audio_data)
+            turn = st.session_state.turn_ledger.get(digest)
+            is_new_turn = turn is None
 
-                response, translated_response = generate_response(transcription_text, mother_tongue)
-                response_audio_path = deepgram_tts(response, "response_audio.mp3", selected_module)
+            # A newer recording supersedes whatever turn is still in flight.
+            active = st.session_state.get("active_turn")
+            if active is not None and active["digest"] != digest:
+                active["future"].cancel()
+                st.session_state.active_turn = active = None
 
-                if response_audio_path:
-                    st.audio(response_audio_path, format="audio/mp3", autoplay=True)
+            said_slot = st.empty()
+            audio_slot = st.empty()
+            if is_new_turn:
+                if active is None:
+                    active = start_voice_turn(digest, wav_audio_data, mother_tongue)
+                with st.spinner('Processing your audio...'):
+                    turn = follow_voice_turn(active, live_reply, said_slot, audio_slot)
+                live_reply.empty()
+            elif turn.get("error"):
+                st.error(turn["error"])
+            else:
+                said_slot.success(f"You said: {turn['transcription']}")
+                response_audio = st.session_state.session_audio.get(turn["audio"])
+                if response_audio:
+                    # Later reruns just show the player without autoplay.
+                    audio_slot.audio(response_audio, format="audio/mp3")
+            if turn is not None and turn.get("fluency"):
+                st.caption(describe_fluency(turn["fluency"]))
+            if turn is not None and turn.get("timings", {}).get("transcribe_gaps"):
+                st.caption(f"{turn['timings']['transcribe_gaps']} part(s) of your recording could not be transcribed.")
+            if turn is not None and turn.get("timings", {}).get("upload_bytes_saved", 0) > 0:
+                st.caption(f"Upload trimmed by {turn['timings']['upload_bytes_saved'] / 1024:.0f} KB")
 
     with right_col:
-        st.markdown("### 💬 Conversation")
-        
         # Create a scrollable container with fixed height
         chat_container = st.container()
-        
-        # Add custom CSS for better chat display
-        st.markdown("""
-            <style>
-            .chat-message {
-                padding: 1rem;
-                border-radius: 0.5rem;
-                margin-bottom: 1rem;
-                white-space: pre-wrap;
-                word-wrap: break-word;
-                color: #3A3B3C;
-            }
-            .user-message {
-                background-color: #f0f2f6;
-                margin-left: 20%;
-                text-align: right;
-            }
-            .assistant-message {
-                background-color: #e6f3e6;
-                margin-right: 20%;
-                text-align: left;
-            }
-            .translated-message {
-                background-color: #f5f5f5;
-                margin-right: 20%;
-                text-align: left;
-                font-style: italic;
-            }
-            </style>
-        """, unsafe_allow_html=True)
     
         with chat_container:
-            # Get non-system messages
-            messages = [msg for msg in st.session_state.chat_history if msg["role"] != "system"]
-            
-            # Reverse the messages list to show latest messages first
-            for message in reversed(messages):
-                if message["role"] == "user":
-                    st.markdown(
-                        f"""<div class="chat-message user-message">
-                            👤 You:<br>{message['content']}
-                        </div>""", 
-                        unsafe_allow_html=True
-                    )
-                elif message["role"] == "assistant_translated":
-                    st.markdown(
-                        f"""<div class="chat-message translated-message">
-                            🤖 Engli (Translated):<br>{message['content']}
-                        </div>""",
-                        unsafe_allow_html=True
-                    )
-                elif message["role"] == "assistant":
-                    st.markdown(
-                        f"""<div class="chat-message assistant-message">
-                            🤖 Engli:<br>{message['content']}
-                        </div>""",
-                        unsafe_allow_html=True
-                    )
+            # Only a window of recent messages is sent, as a single markdown
+            # element, so a rerun costs the same however long the session is.
+            limit = HISTORY_PAGE_SIZE * st.session_state.history_pages
+            messages, has_older = recent_messages(st.session_state.chat_history, limit)
+            if messages:
+                st.markdown(
+                    "".join(render_message(message["role"], message["content"]) for message in messages),
+                    unsafe_allow_html=True,
+                )
+            if has_older:
+                # The click reruns the fragment; the callback runs first.
+                st.button("Load older messages", key="load_older", on_click=load_older_messages)
             
             # st.markdown("## 💬 Full Chat History (JSON Format)")
             
@@ -505,6 +1117,11 @@ else:
             #     st.code(chat_history_json, language="json")
             # else:
             #     st.info("No chat history available.")    
+
+if selected_module == "Pronunciation Checker":
+    pronunciation_checker()
+else:
+    voice_session(mother_tongue)
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -556,3 +1173,5 @@ st.markdown("""
     </div>
 </div>
 """, unsafe_allow_html=True)
+
+record_first_run("appfunctions", PAGE_STARTED)
@@ -0,0 +1,80 @@
+import random
+import re
+
+import pytest
+
+from engli.cleaner import StreamingCleaner, clean_action_descriptors
+
+SPANS = ("({})", "**{}**", "*{}*", "[{}]", "_{}_")
+WORDS = ("hello", "there", "Grand", "craic", "you're", "5", "lads", "well")
+
+
+def reference_clean(text):
+    """The seven regex passes clean_action_descriptors replaced."""
+    if not text:
+        return text
+    text = re.sub(r'\([^)]+\)', '', text)
+    text = re.sub(r'\*\*[^*]+\*\*', '', text)
+    text = re.sub(r'\*[^*]+\*', '', text)
+    text = re.sub(r'\[[^\]]+\]', '', text)
+    text = re.sub(r'_[^_]+_', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s+([.,!?])', r'\1', text)
+    text = re.sub(r'\n\s*\n', '\n', text)
+    return text.strip()
+
+
+def well_formed_reply(rng):
+    """Words, punctuation and complete, non-nested action spans."""
+    parts = []
+    for _ in range(rng.randint(1, 30)):
+        roll = rng.random()
+        if roll < 0.2:
+            inner = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            parts.append(rng.choice(SPANS).format(inner))
+        elif roll < 0.3:
+            parts.append(rng.choice(".,!?"))
+        else:
+            parts.append(rng.choice(WORDS))
+    return "".join(part + rng.choice(("", " ", " ", "  ", "\n", "\n\n")) for part in parts)
+
+
+def chunked(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 10)))) if len(text) > 1 else []
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("(laughs) Hello there!", "Hello there!"),
+    ("**smiles** Grand , so *pauses* it is .", "Grand, so it is."),
+    ("Well [waves] hello _sighs_ there", "Well hello there"),
+    ("", ""),
+])
+def test_examples(text, expected):
+    assert clean_action_descriptors(text) == expected
+
+
+def test_matches_reference_on_well_formed_spans():
+    rng = random.Random(20)
+    for _ in range(2000):
+        text = well_formed_reply(rng)
+        assert clean_action_descriptors(text) == reference_clean(text), text
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_output_does_not_depend_on_chunking(seed):
+    rng = random.Random(seed)
+    alphabet = "ab .,!?()*[]_\n"
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        cleaner = StreamingCleaner()
+        streamed = "".join(cleaner.feed(chunk) for chunk in chunked(text, rng)) + cleaner.flush()
+        assert streamed == clean_action_descriptors(text), text
+
+
+def test_unclosed_span_is_held_back_until_flush():
+    cleaner = StreamingCleaner()
+    assert cleaner.feed("Hello (laugh") == "Hello"
+    assert cleaner.feed("s) there") == " there"
+    assert cleaner.feed(" (never closed") == ""
+    assert cleaner.flush() == " (never closed"
@@ -0,0 +1,43 @@
+from engli.context_window import ContextWindow, ConversationSummary
+
+
+def history(turns, words=10):
+    messages = [{"role": "system", "content": "You are Engli."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "word " * words})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "word " * words})
+    return messages
+
+
+def test_short_conversation_is_sent_whole():
+    messages, overflow, start = ContextWindow(keep_turns=6).build(history(3), ConversationSummary())
+    assert messages == history(3)
+    assert overflow == []
+    assert start == 0
+
+
+def test_keeps_only_the_most_recent_turns():
+    messages, overflow, start = ContextWindow(budget_tokens=10000, keep_turns=2).build(history(5), ConversationSummary())
+    assert messages[0]["role"] == "system"
+    assert [m["content"].split()[:2] for m in messages[1:]] == [
+        ["question", "3"], ["answer", "3"], ["question", "4"], ["answer", "4"],
+    ]
+    assert start == 6
+    assert len(overflow) == 6
+
+
+def test_token_budget_limits_turns_but_keeps_the_latest():
+    messages, _, _ = ContextWindow(budget_tokens=1, keep_turns=6).build(history(4, words=200), ConversationSummary())
+    assert [m["role"] for m in messages] == ["system", "user", "assistant"]
+    assert messages[1]["content"].startswith("question 3")
+
+
+def test_summary_is_sent_and_covered_turns_are_not_overflow_again():
+    summary = ConversationSummary()
+    assert summary.begin_update()
+    assert not summary.begin_update()
+    summary.finish_update("The learner is a nurse.", 4)
+    messages, overflow, start = ContextWindow(budget_tokens=10000, keep_turns=2).build(history(5), summary)
+    assert messages[1] == {"role": "system", "content": "Summary of the earlier conversation: The learner is a nurse."}
+    assert overflow == history(5)[1:][4:start]
+    assert len(overflow) == 2
@@ -0,0 +1,57 @@
+import asyncio
+
+from engli.hedging import HedgePolicy, hedged
+
+
+def policy(**kwargs):
+    kwargs.setdefault("min_samples", 1)
+    kwargs.setdefault("max_hedge_rate", 1.0)
+    kwargs.setdefault("min_delay", 0.01)
+    hedge = HedgePolicy(**kwargs)
+    hedge.observe("k", 0.01)
+    return hedge
+
+
+def answer(value, delay):
+    async def run():
+        await asyncio.sleep(delay)
+        return value
+    return run
+
+
+def fail(delay):
+    async def run():
+        await asyncio.sleep(delay)
+        raise ConnectionError("dropped")
+    return run
+
+
+def test_no_policy_just_awaits_primary():
+    assert asyncio.run(hedged(None, "k", answer("a", 0), answer("b", 0))) == "a"
+
+
+def test_fast_primary_is_not_hedged():
+    hedge = policy()
+    hedge.observe("k", 1.0)
+    assert asyncio.run(hedged(hedge, "k", answer("a", 0), answer("b", 0))) == "a"
+    assert hedge.stats()["hedged"] == 0
+
+
+def test_slow_primary_loses_to_backup_and_latency_is_keyed():
+    hedge = policy()
+    result = asyncio.run(hedged(hedge, "k", answer("a", 0.5), answer("b", 0.01), backup_key="k2"))
+    assert result == "b"
+    assert hedge.stats()["backup_wins"] == 1
+    assert hedge.delay("k2") is not None
+
+
+def test_failed_backup_still_waits_for_primary():
+    hedge = policy()
+    assert asyncio.run(hedged(hedge, "k", answer("a", 0.1), fail(0))) == "a"
+
+
+def test_no_hedging_before_min_samples_or_over_budget():
+    assert HedgePolicy(min_samples=5).delay("k") is None
+    hedge = policy(max_hedge_rate=0.1)
+    hedge.count(True, False)
+    assert hedge.delay("k") is None
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from engli.resilience import CircuitBreaker, CircuitOpen, Resilience, RetryPolicy, is_retriable
+
+
+class HttpError(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status_code = status
+
+
+def no_wait():
+    return RetryPolicy(attempts=3, base_delay=0, max_delay=0)
+
+
+def flaky(errors, result="ok"):
+    calls = []
+
+    def run():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return run, calls
+
+
+def test_retriable_errors():
+    assert is_retriable(TimeoutError())
+    assert is_retriable(HttpError(429))
+    assert is_retriable(HttpError(503))
+    assert not is_retriable(HttpError(400))
+    assert not is_retriable(ValueError())
+    try:
+        try:
+            raise ConnectionError()
+        except ConnectionError:
+            raise RuntimeError("wrapped")
+    except RuntimeError as e:
+        assert is_retriable(e)
+
+
+def test_retries_until_success():
+    resilience = Resilience(no_wait())
+    run, calls = flaky([HttpError(503), ConnectionError()])
+    assert resilience.call_sync("api", run) == "ok"
+    assert len(calls) == 3
+    assert resilience.stats()["api"]["retries"] == 2
+
+
+def test_bad_request_is_not_retried():
+    resilience = Resilience(no_wait())
+    run, calls = flaky([HttpError(400)])
+    with pytest.raises(HttpError):
+        resilience.call_sync("api", run)
+    assert len(calls) == 1
+
+
+def test_async_call_times_out_and_retries():
+    resilience = Resilience(no_wait(), timeouts={"api": 0.01})
+    attempts = []
+
+    async def slow_then_fast():
+        attempts.append(1)
+        await asyncio.sleep(1 if len(attempts) == 1 else 0)
+        return "ok"
+
+    assert asyncio.run(resilience.call("api", slow_then_fast)) == "ok"
+    assert resilience.stats()["api"]["timeouts"] == 1
+
+
+def test_breaker_opens_then_lets_one_trial_through():
+    now = [0.0]
+    breaker = CircuitBreaker("api", failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.failure()
+    breaker.allow()
+    breaker.failure()
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    now[0] = 10
+    breaker.allow()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpen):
+        breaker.allow()
+    breaker.success()
+    assert breaker.state == "closed"
+
+
+def test_open_circuit_short_circuits_calls():
+    resilience = Resilience(RetryPolicy(attempts=1), failure_threshold=1)
+    run, calls = flaky([ConnectionError()] * 5)
+    with pytest.raises(ConnectionError):
+        resilience.call_sync("api", run)
+    with pytest.raises(CircuitOpen):
+        resilience.call_sync("api", run)
+    assert len(calls) == 1
+    assert resilience.stats()["api"]["short_circuits"] == 1
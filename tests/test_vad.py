@@ -0,0 +1,42 @@
+import numpy as np
+
+from engli.vad import pause_profile, trim_silence
+
+RATE = 16000
+
+
+def tone(seconds, level=8000):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (level * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    rng = np.random.default_rng(0)
+    return rng.normal(0, 20, int(seconds * RATE)).astype(np.int16)
+
+
+def test_trims_leading_and_trailing_silence():
+    samples = np.concatenate([silence(1.0), tone(1.0), silence(1.0)])
+    trimmed = trim_silence(samples, RATE)
+    # Speech plus at most the 150 ms padding on each side.
+    assert 1.0 <= len(trimmed) / RATE <= 1.35
+
+
+def test_collapses_long_pauses():
+    samples = np.concatenate([tone(0.5), silence(2.0), tone(0.5)])
+    trimmed = trim_silence(samples, RATE)
+    # The 2 s gap keeps its padding plus at most 600 ms.
+    assert len(trimmed) / RATE < 2.0
+
+
+def test_silent_recording_is_empty():
+    assert len(trim_silence(silence(2.0), RATE)) == 0
+    assert pause_profile(silence(2.0), RATE) == (0.0, [])
+
+
+def test_pause_profile_measures_the_original_gap():
+    samples = np.concatenate([silence(0.5), tone(1.0), silence(1.5), tone(1.0), silence(0.5)])
+    speech_seconds, pauses = pause_profile(samples, RATE)
+    assert len(pauses) == 1
+    assert abs(pauses[0] - 1.5) < 0.25
+    assert abs(speech_seconds - 2.0) < 0.4